@@ -1,6 +1,20 @@
-from flask import Flask, render_template, request
+import json
+import threading
 
-from database import ALLOWED_INDUSTRIES, close_db, connect_to_db, fetch_top_ranked_problems
+from flask import Flask, jsonify, make_response, render_template, request
+
+from app.response_cache import ResponseCache
+from app.snapshot import serve_snapshot, write_snapshot
+from config.config import APP_CACHE_CHECK_SECONDS, SNAPSHOT_DIR, SNAPSHOT_SERVE
+from database import (
+    ALLOWED_INDUSTRIES,
+    PROBLEM_FIELDS,
+    connect_to_db,
+    fetch_ranked_problems_page,
+    fetch_top_ranked_problems,
+    migrate_db,
+    search_query,
+)
 
 # Human-readable labels for industry filter and badges (key = stored value, value = display).
 INDUSTRY_DISPLAY_LABELS = {
@@ -14,9 +28,73 @@ INDUSTRY_DISPLAY_LABELS = {
     "other": "Other",
 }
 
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 200
+MAX_SEARCH_LENGTH = 200
+
+_local = threading.local()
+
+
+def get_read_connection():
+    """Read-only connection of the current worker thread, opened on first use and reused across requests."""
+    db = getattr(_local, "db", None)
+    if db is None:
+        db = _local.db = connect_to_db(read_only=True)
+    return db
+
+
+def get_response_cache() -> ResponseCache:
+    """Rendered-page cache tied to this thread's read connection."""
+    cache = getattr(_local, "response_cache", None)
+    if cache is None:
+        cache = _local.response_cache = ResponseCache(get_read_connection(), APP_CACHE_CHECK_SECONDS)
+    return cache
+
+
+def cached_response(key: tuple, render, mimetype: str = "text/html"):
+    """Response for a cached rendering with its ETag; browsers revalidate each time and unchanged data answers 304."""
+    body, etag = get_response_cache().get(key, render)
+    response = make_response(body)
+    response.mimetype = mimetype
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+def _api_error(message: str):
+    return jsonify(error=message), 400
+
+
+def _search_arg() -> str | None:
+    """The q parameter, or None when it is missing or has no searchable words."""
+    search = (request.args.get("q") or "").strip()[:MAX_SEARCH_LENGTH]
+    return search if search_query(search) else None
+
+
+def render_index(
+    problems, problem_size_filter: str | None, industry_filter: str | None, search: str | None = None
+) -> str:
+    """Index page for the given problems, active filters and search (needs an application/request context)."""
+    return render_template(
+        "index.html",
+        problems=problems,
+        problem_size_filter=problem_size_filter,
+        industry_filter=industry_filter,
+        search=search,
+        allowed_industries=ALLOWED_INDUSTRIES,
+        industry_display_labels=INDUSTRY_DISPLAY_LABELS,
+    )
+
+
+def write_index_snapshot(db_connection, root=SNAPSHOT_DIR) -> int:
+    """Pre-render the index page for every filter combination into root (see app.snapshot); returns files written."""
+    with app.test_request_context():
+        return write_snapshot(db_connection, render_index, root)
+
 
 def create_app():
     app = Flask(__name__)
+    migrate_db()
 
     @app.route("/")
     def index():
@@ -27,24 +105,71 @@ def create_app():
         industry_filter = request.args.get("industry") or None
         if industry_filter not in ALLOWED_INDUSTRIES:
             industry_filter = None
-        db = connect_to_db()
-        try:
+        search = _search_arg()
+
+        if SNAPSHOT_SERVE and SNAPSHOT_DIR and search is None:
+            response = serve_snapshot(SNAPSHOT_DIR, problem_size_filter, industry_filter)
+            if response is not None:
+                return response
+
+        def render():
             problems = fetch_top_ranked_problems(
-                db,
+                get_read_connection(),
                 limit=20,
                 problem_size=problem_size_filter,
                 industry=industry_filter,
+                query=search,
             )
-            return render_template(
-                "index.html",
-                problems=problems,
-                problem_size_filter=problem_size_filter,
-                industry_filter=industry_filter,
-                allowed_industries=ALLOWED_INDUSTRIES,
-                industry_display_labels=INDUSTRY_DISPLAY_LABELS,
+            return render_index(problems, problem_size_filter, industry_filter, search)
+
+        return cached_response((problem_size_filter, industry_filter, search), render)
+
+    @app.route("/api/problems")
+    def api_problems():
+        """Ranked (or, with q, searched) problems as JSON; pass the previous page's next_after as after for the next page."""
+        problem_size_filter = request.args.get("problem_size") or None
+        if problem_size_filter not in (None, "niche", "global"):
+            return _api_error("problem_size must be niche or global")
+        industry_filter = request.args.get("industry") or None
+        if industry_filter is not None and industry_filter not in ALLOWED_INDUSTRIES:
+            return _api_error(f"industry must be one of: {', '.join(ALLOWED_INDUSTRIES)}")
+        search = _search_arg()
+        try:
+            limit = int(request.args.get("limit") or API_PAGE_SIZE)
+            after_arg = request.args.get("after")
+            after = None
+            if after_arg:
+                rank, uid = after_arg.split(":")
+                after = (float(rank) if search else int(rank), int(uid))
+        except ValueError:
+            return _api_error("limit must be an integer and after a next_after value from the previous page")
+        if not 1 <= limit <= API_MAX_PAGE_SIZE:
+            return _api_error(f"limit must be between 1 and {API_MAX_PAGE_SIZE}")
+        fields_arg = request.args.get("fields")
+        fields = tuple(field.strip() for field in fields_arg.split(",") if field.strip()) if fields_arg else PROBLEM_FIELDS
+        unknown = set(fields) - set(PROBLEM_FIELDS)
+        if unknown:
+            return _api_error(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+        def render():
+            problems = fetch_ranked_problems_page(
+                get_read_connection(),
+                limit=limit,
+                problem_size=problem_size_filter,
+                industry=industry_filter,
+                after=after,
+                fields=fields,
+                query=search,
             )
-        finally:
-            close_db(db)
+            next_after = None
+            if len(problems) == limit:
+                last = problems[-1]
+                rank = last["search_rank"] if search else last["total_score"]
+                next_after = f"{rank!r}:{last['uid']}"
+            return json.dumps({"problems": problems, "next_after": next_after}, ensure_ascii=False)
+
+        key = ("api", problem_size_filter, industry_filter, search, limit, after, frozenset(fields))
+        return cached_response(key, render, mimetype="application/json")
 
     return app
 
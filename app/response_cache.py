@@ -0,0 +1,46 @@
+"""In-process cache of rendered pages, invalidated when the database changes."""
+
+import hashlib
+import time
+from typing import Callable
+
+from database import get_query
+
+
+class ResponseCache:
+    """Rendered bodies and their ETags per key, valid while PRAGMA data_version of one connection is unchanged.
+
+    data_version only moves when another connection (the pipeline) commits, and is only comparable on the same
+    connection, so there is one cache per read connection. It is polled at most every check_seconds; in between,
+    hits are served without touching SQLite or the template engine. Past max_entries (API pages are keyed by
+    cursor, limit and fields) the cache starts over rather than growing without bound.
+    """
+
+    def __init__(self, db_connection, check_seconds: float, max_entries: int = 512):
+        self._db = db_connection
+        self._check_seconds = check_seconds
+        self._max_entries = max_entries
+        self._version = None
+        self._checked_at = float("-inf")
+        self._entries: dict[tuple, tuple[bytes, str]] = {}
+
+    def _refresh_version(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self._check_seconds:
+            return
+        self._checked_at = now
+        ((version,),) = get_query(self._db, "PRAGMA data_version")
+        if version != self._version:
+            self._version = version
+            self._entries.clear()
+
+    def get(self, key: tuple, render: Callable[[], str]) -> tuple[bytes, str]:
+        """Return (body, etag) for key, rendering it on a miss. The ETag is a hash of the body, so it agrees across workers."""
+        self._refresh_version()
+        entry = self._entries.get(key)
+        if entry is None:
+            if len(self._entries) >= self._max_entries:
+                self._entries.clear()
+            body = render().encode("utf-8")
+            entry = self._entries[key] = (body, hashlib.sha256(body).hexdigest()[:32])
+        return entry
@@ -0,0 +1,109 @@
+"""Static snapshot of the index page: every filter combination pre-rendered to files a proxy (or the app) serves as is."""
+
+import gzip
+import json
+import os
+import tempfile
+from itertools import product
+from pathlib import Path
+from typing import Callable
+
+from flask import request, send_file
+
+from database import ALLOWED_INDUSTRIES, fetch_top_ranked_problems
+
+try:
+    import brotli
+except ImportError:  # optional: without it only the gzip variants are written
+    brotli = None
+
+PROBLEM_SIZES = ("niche", "global")
+PAGE_LIMIT = 20
+_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def filter_combinations() -> list[tuple[str | None, str | None]]:
+    """(problem_size, industry) for every filter the index page offers, None meaning "All"."""
+    return list(product((None, *PROBLEM_SIZES), (None, *ALLOWED_INDUSTRIES)))
+
+
+def snapshot_path(root: str | Path, problem_size: str | None, industry: str | None, suffix: str = ".html") -> Path:
+    """root/<problem_size or all>/<industry or all><suffix>, e.g. snapshot/niche/all.html for ?problem_size=niche."""
+    return Path(root) / (problem_size or "all") / f"{industry or 'all'}{suffix}"
+
+
+def _encoded(body: bytes) -> list[tuple[str, bytes]]:
+    """(file suffix, bytes) of the plain body and its precompressed variants (gzip without timestamp, so unchanged
+    pages compress to unchanged files)."""
+    variants = [("", body), (".gz", gzip.compress(body, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append((".br", brotli.compress(body)))
+    return variants
+
+
+def _write_atomic(path: Path, data: bytes) -> bool:
+    """Replace path with data through a temp file and rename, so readers see the old or the new file, never a partial
+    one. Files whose content did not change are left alone (keeps their mtime-based ETags). Returns True if written."""
+    try:
+        if path.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp, 0o644)  # mkstemp creates 0600; the proxy may run as another user
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return True
+
+
+def write_snapshot(db_connection, render: Callable[..., str], root: str | Path) -> int:
+    """Render the index page (HTML) and its problem list (JSON) for every filter combination into root.
+
+    render(problems, problem_size, industry) returns the page; it needs an application/request context. All pages
+    are read in one transaction, so they agree with each other. Returns the number of files written.
+    """
+    conn = db_connection["conn"]
+    written = 0
+    conn.execute("BEGIN")
+    try:
+        for problem_size, industry in filter_combinations():
+            problems = fetch_top_ranked_problems(
+                db_connection, limit=PAGE_LIMIT, problem_size=problem_size, industry=industry
+            )
+            page = render(problems, problem_size, industry).encode("utf-8")
+            data = json.dumps(
+                {"problem_size": problem_size, "industry": industry, "problems": problems}, ensure_ascii=False
+            ).encode("utf-8")
+            for suffix, body in ((".html", page), (".json", data)):
+                for encoding_suffix, content in _encoded(body):
+                    path = snapshot_path(root, problem_size, industry, suffix + encoding_suffix)
+                    written += _write_atomic(path, content)
+    finally:
+        conn.rollback()
+    return written
+
+
+def serve_snapshot(root: str | Path, problem_size: str | None, industry: str | None):
+    """Response with the snapshot page for the filters (precompressed variant if the client accepts it), or None if
+    there is no snapshot. send_file answers conditional requests from the file's mtime/size ETag."""
+    path = snapshot_path(root, problem_size, industry)
+    if not path.is_file():
+        return None
+    chosen, content_encoding = path, None
+    for encoding, suffix in _ENCODINGS:
+        variant = path.with_name(path.name + suffix)
+        if request.accept_encodings[encoding] and variant.is_file():
+            chosen, content_encoding = variant, encoding
+            break
+    response = send_file(chosen, mimetype="text/html", conditional=True, etag=True)
+    if content_encoding:
+        response.headers["Content-Encoding"] = content_encoding
+    response.vary.add("Accept-Encoding")
+    response.cache_control.no_cache = True
+    return response
@@ -10,8 +10,28 @@ _DEFAULT_FETCH_HTML_HEADERS = {
     "User-Agent": "newsolvr/1.0 (news aggregation; +https://github.com/newsolvr)"
 }
 
+# Weight per analysis subscore (each 0–5) in original_score/total_score; override with a JSON object.
+_DEFAULT_SCORE_WEIGHTS = {
+    "meaningful_problem": 5,
+    "pain_intensity": 2,
+    "frequency": 1,
+    "market_growth": 3,
+    "willingness_to_pay": 1,
+    "target_customer_clarity": 1,
+    "problem_awareness": 1,
+    "competition": 1,
+    "software_solution": 2,
+    "ai_fit": 2,
+    "speed_to_mvp": 3,
+    "business_potential": 1,
+    "time_relevancy": 1,
+}
+
 # Database
 DB_PATH = os.getenv("DB_PATH")
+BULK_WRITE_BATCH_SIZE = int(os.getenv("BULK_WRITE_BATCH_SIZE", "500"))
+SQLITE_MMAP_SIZE_MB = int(os.getenv("SQLITE_MMAP_SIZE_MB", "256"))
+SQLITE_CACHE_SIZE_MB = int(os.getenv("SQLITE_CACHE_SIZE_MB", "64"))  # page cache per connection
 
 # APIs
 NEWS_API_KEY = os.getenv("NEWS_API_KEY")
@@ -21,13 +41,58 @@ TIMES_SECRET = os.getenv("TIMES_SECRET")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
 # Internal logic
+LLM_MODEL = os.getenv("LLM_MODEL", "gemini-2.5-flash-lite")
+LLM_PROMPT_CACHE_TTL_MINUTES = int(os.getenv("LLM_PROMPT_CACHE_TTL_MINUTES", "60"))  # 0 sends the prompt inline
 LLM_RATE_LIMIT_RPM = int(os.getenv("LLM_RATE_LIMIT_RPM"))
 LLM_RATE_LIMIT_RPD = int(os.getenv("LLM_RATE_LIMIT_RPD"))
+LLM_RATE_LIMIT_TPM = int(os.getenv("LLM_RATE_LIMIT_TPM", "250000"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+LLM_BATCH_MAX_ARTICLES = int(os.getenv("LLM_BATCH_MAX_ARTICLES", "500"))  # per batch job (inline requests are size-capped)
+LLM_BATCH_POLL_SECONDS = int(os.getenv("LLM_BATCH_POLL_SECONDS", "30"))
+LLM_QUOTA_TIMEZONE = os.getenv("LLM_QUOTA_TIMEZONE", "America/Los_Angeles")  # Gemini RPD resets at Pacific midnight
+PREFILTER_MODEL_PATH = os.getenv(
+    "PREFILTER_MODEL_PATH", str(Path(__file__).resolve().parent.parent / ".cache" / "prefilter_model.json")
+)
+PREFILTER_TARGET_RECALL = float(os.getenv("PREFILTER_TARGET_RECALL", "0.95"))  # share of keepers still sent to the LLM
+PREFILTER_MIN_EXAMPLES = int(os.getenv("PREFILTER_MIN_EXAMPLES", "200"))
 API_EXTRACTION_LAG_MINUTES = int(os.getenv("API_EXTRACTION_LAG_MINUTES"))
 API_EXTRACTION_WINDOW = int(os.getenv("API_EXTRACTION_WINDOW"))
 
+# HTTP client (shared pooled session for the API extractors)
+API_REQUEST_TIMEOUT = int(os.getenv("API_REQUEST_TIMEOUT", "30"))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "16"))
+NEWS_API_CONCURRENCY = int(os.getenv("NEWS_API_CONCURRENCY", "4"))
+GUARDIAN_API_CONCURRENCY = int(os.getenv("GUARDIAN_API_CONCURRENCY", "4"))
+TIMES_API_CONCURRENCY = int(os.getenv("TIMES_API_CONCURRENCY", "2"))
+# Request rate budgets per API (requests per minute, 0 = unlimited) and Times speculative page prefetch.
+NEWS_API_RPM = float(os.getenv("NEWS_API_RPM", "0"))
+GUARDIAN_API_RPM = float(os.getenv("GUARDIAN_API_RPM", "60"))
+TIMES_API_RPM = float(os.getenv("TIMES_API_RPM", "5"))
+TIMES_API_PREFETCH_PAGES = int(os.getenv("TIMES_API_PREFETCH_PAGES", "2"))
+# News API free tier: 100 requests/day. Cap per pipeline run (0 = unlimited); cap-driven window splits beyond it wait.
+NEWS_API_MAX_REQUESTS_PER_RUN = int(os.getenv("NEWS_API_MAX_REQUESTS_PER_RUN", "25"))
+
 # Web scraping
 FETCH_HTML_TIMEOUT = int(os.getenv("FETCH_HTML_TIMEOUT", "10"))
 _headers_env = os.getenv("FETCH_HTML_HEADERS")
 FETCH_HTML_HEADERS = json.loads(_headers_env) if _headers_env else _DEFAULT_FETCH_HTML_HEADERS
-SCRAPE_DELAY_SECONDS = int(os.getenv("SCRAPE_DELAY_SECONDS", "1"))
+SCRAPE_DELAY_SECONDS = int(os.getenv("SCRAPE_DELAY_SECONDS", "1"))  # per host; robots Crawl-delay wins if larger
+SCRAPE_MAX_HOSTS = int(os.getenv("SCRAPE_MAX_HOSTS", "16"))
+HTML_CACHE_DIR = os.getenv(
+    "HTML_CACHE_DIR", str(Path(__file__).resolve().parent.parent / ".cache" / "html")
+)  # empty disables the cache
+HTML_CACHE_MAX_MB = int(os.getenv("HTML_CACHE_MAX_MB", "512"))
+HTML_CACHE_TTL_HOURS = float(os.getenv("HTML_CACHE_TTL_HOURS", "24"))
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", str(os.cpu_count() or 1)))
+
+# Scoring
+_score_weights_env = os.getenv("SCORE_WEIGHTS")
+SCORE_WEIGHTS = json.loads(_score_weights_env) if _score_weights_env else _DEFAULT_SCORE_WEIGHTS
+
+# Web app
+APP_CACHE_CHECK_SECONDS = float(os.getenv("APP_CACHE_CHECK_SECONDS", "2"))  # how often cached pages check for new data
+SNAPSHOT_DIR = os.getenv(
+    "SNAPSHOT_DIR", str(Path(__file__).resolve().parent.parent / ".cache" / "snapshot")
+)  # pre-rendered pages written after each pipeline run; empty disables the snapshot stage
+SNAPSHOT_SERVE = os.getenv("SNAPSHOT_SERVE", "false").lower() == "true"  # let Flask serve the snapshot files itself
@@ -1,23 +1,60 @@
 from database.db_utils import (
     ALLOWED_INDUSTRIES,
+    PROBLEM_FIELDS,
+    add_llm_usage,
     close_db,
+    collect_prefilter_examples,
+    compress_body,
     connect_to_db,
+    decompress_body,
+    fetch_prefilter_examples,
+    fetch_ranked_problems_page,
     fetch_top_ranked_problems,
     fetch_unanalyzed_articles,
+    get_cached_analyses,
+    get_extraction_state,
     get_query,
+    hold_back_articles,
+    insert_articles,
+    iter_article_bodies,
+    record_prefilter_examples,
+    run_many,
     run_query,
-    save_article_analysis,
-    update_article_content,
+    save_articles_analysis,
+    save_cached_analyses,
+    save_extraction_state,
+    search_query,
+    update_articles_content,
 )
+from database.migrations import migrate, migrate_db
 
 __all__ = [
     "ALLOWED_INDUSTRIES",
+    "PROBLEM_FIELDS",
+    "add_llm_usage",
     "close_db",
+    "collect_prefilter_examples",
+    "compress_body",
     "connect_to_db",
+    "decompress_body",
+    "fetch_prefilter_examples",
+    "fetch_ranked_problems_page",
     "fetch_top_ranked_problems",
     "fetch_unanalyzed_articles",
+    "get_cached_analyses",
+    "get_extraction_state",
     "get_query",
+    "hold_back_articles",
+    "insert_articles",
+    "iter_article_bodies",
+    "migrate",
+    "migrate_db",
+    "record_prefilter_examples",
+    "run_many",
     "run_query",
-    "save_article_analysis",
-    "update_article_content",
+    "save_articles_analysis",
+    "save_cached_analyses",
+    "save_extraction_state",
+    "search_query",
+    "update_articles_content",
 ]
@@ -1,15 +1,130 @@
--- SQLite schema (table is created automatically on first connect via db_utils).
+-- SQLite schema (created and upgraded by the versioned migrations in database/migrations.py at startup).
 -- For reference only:
+-- Article bodies are kept compressed in article_bodies (below), not in newsolvr.
 CREATE TABLE IF NOT EXISTS newsolvr (
     uid INTEGER PRIMARY KEY AUTOINCREMENT,
     title_article TEXT,
-    content_article TEXT,
     link_article TEXT UNIQUE,
     published_date TEXT,
-    problem_verified TEXT,
     problem_summary TEXT,
-    evidence_from_article TEXT,
-    startup_idea TEXT,
-    why_now TEXT,
-    early_adopters TEXT
+    problem_statement TEXT,
+    meaningful_problem INTEGER,
+    pain_intensity INTEGER,
+    frequency INTEGER,
+    problem_size TEXT,
+    industry TEXT,
+    market_growth INTEGER,
+    willingness_to_pay INTEGER,
+    target_customer_clarity INTEGER,
+    problem_awareness INTEGER,
+    competition INTEGER,
+    software_solution INTEGER,
+    ai_fit INTEGER,
+    speed_to_mvp INTEGER,
+    business_potential INTEGER,
+    time_relevancy INTEGER,
+    total_score INTEGER,
+    original_score INTEGER,
+    simhash INTEGER,         -- 64-bit SimHash of the body, NULL until deduplication fingerprints the row
+    next_decay_at INTEGER,   -- epoch second the timeliness multiplier next drops
+    published_at INTEGER,    -- published_date normalized to UTC epoch seconds at ingest
+    held_back_at INTEGER     -- epoch second the pre-filter held the unanalyzed row back (deleted by cleanup)
+);
+
+-- Incremental extraction: last ingested timestamp per source/query plus finished windows past it (JSON).
+CREATE TABLE IF NOT EXISTS extraction_state (
+    source TEXT NOT NULL,
+    query TEXT NOT NULL,
+    watermark TEXT,
+    cursor TEXT,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (source, query)
+);
+
+-- Gemini requests/tokens spent per quota day (daily limit survives restarts).
+CREATE TABLE IF NOT EXISTS llm_usage (
+    day TEXT PRIMARY KEY,
+    requests INTEGER NOT NULL DEFAULT 0,
+    tokens INTEGER NOT NULL DEFAULT 0
+);
+
+-- LLM reports by hash of normalized article text + prompt/model version; survives cleanup of newsolvr rows.
+CREATE TABLE IF NOT EXISTS analysis_cache (
+    content_hash TEXT PRIMARY KEY,
+    report TEXT NOT NULL,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Scored articles kept as training data for the local pre-filter (cleanup deletes most newsolvr rows); keeps its own
+-- truncated, uncompressed copy of the article text.
+CREATE TABLE IF NOT EXISTS prefilter_examples (
+    uid INTEGER PRIMARY KEY,
+    title_article TEXT,
+    content_article TEXT,
+    original_score INTEGER NOT NULL,
+    recorded_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Near-duplicate index over newsolvr.simhash (64-bit SimHash of 2-word shingles): one key per combination of 3 of its
+-- 10 blocks (band = combination number, 120 per article).
+CREATE TABLE IF NOT EXISTS simhash_bands (
+    band INTEGER NOT NULL,
+    value INTEGER NOT NULL,
+    uid INTEGER NOT NULL,
+    PRIMARY KEY (band, value, uid)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_simhash_bands_uid ON simhash_bands (uid);
+CREATE TRIGGER IF NOT EXISTS newsolvr_simhash_bands_ad AFTER DELETE ON newsolvr BEGIN
+    DELETE FROM simhash_bands WHERE uid = old.uid;
+END;
+
+-- Incremental scoring.
+CREATE INDEX IF NOT EXISTS idx_newsolvr_original_score ON newsolvr (original_score);
+CREATE INDEX IF NOT EXISTS idx_newsolvr_next_decay ON newsolvr (next_decay_at);
+
+-- Same-title duplicate lookup: title_article = ? AND published_at within the match window.
+CREATE INDEX IF NOT EXISTS idx_newsolvr_title_published ON newsolvr (title_article, published_at);
+
+-- Hot read paths: analysis backlog and the frontend's top problems (partial indexes).
+-- connect_to_db also sets PRAGMA journal_mode=WAL, synchronous=NORMAL, mmap_size and cache_size.
+CREATE INDEX IF NOT EXISTS idx_newsolvr_unanalyzed ON newsolvr (uid) WHERE problem_statement IS NULL AND held_back_at IS NULL;
+CREATE INDEX IF NOT EXISTS idx_newsolvr_ranked ON newsolvr (total_score)
+    WHERE total_score > 85 AND problem_statement IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_newsolvr_ranked_size ON newsolvr (problem_size, total_score)
+    WHERE total_score > 85 AND problem_statement IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_newsolvr_ranked_industry ON newsolvr (industry, total_score)
+    WHERE total_score > 85 AND problem_statement IS NOT NULL;
+
+-- Full-text search over problems (external content on newsolvr, kept in sync by triggers)
+CREATE VIRTUAL TABLE IF NOT EXISTS problems_fts USING fts5(
+    title_article, problem_summary, problem_statement,
+    content='newsolvr', content_rowid='uid', tokenize='porter unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS newsolvr_fts_ai AFTER INSERT ON newsolvr BEGIN
+    INSERT INTO problems_fts (rowid, title_article, problem_summary, problem_statement)
+    VALUES (new.uid, new.title_article, new.problem_summary, new.problem_statement);
+END;
+
+CREATE TRIGGER IF NOT EXISTS newsolvr_fts_ad AFTER DELETE ON newsolvr BEGIN
+    INSERT INTO problems_fts (problems_fts, rowid, title_article, problem_summary, problem_statement)
+    VALUES ('delete', old.uid, old.title_article, old.problem_summary, old.problem_statement);
+END;
+
+CREATE TRIGGER IF NOT EXISTS newsolvr_fts_au
+AFTER UPDATE OF title_article, problem_summary, problem_statement ON newsolvr BEGIN
+    INSERT INTO problems_fts (problems_fts, rowid, title_article, problem_summary, problem_statement)
+    VALUES ('delete', old.uid, old.title_article, old.problem_summary, old.problem_statement);
+    INSERT INTO problems_fts (rowid, title_article, problem_summary, problem_statement)
+    VALUES (new.uid, new.title_article, new.problem_summary, new.problem_statement);
+END;
+
+-- Article bodies (zlib-compressed UTF-8), one row per newsolvr row that has content.
+CREATE TABLE IF NOT EXISTS article_bodies (
+    uid INTEGER PRIMARY KEY,
+    body BLOB NOT NULL
 );
+
+CREATE TRIGGER IF NOT EXISTS newsolvr_article_bodies_ad AFTER DELETE ON newsolvr BEGIN
+    DELETE FROM article_bodies WHERE uid = old.uid;
+END;
@@ -1,7 +1,14 @@
+import json
+import re
 import sqlite3
 import threading
+import zlib
+from datetime import datetime, timezone
+from itertools import batched
+from pathlib import Path
+from typing import Iterable, Iterator
 
-from config.config import DB_PATH
+from config.config import BULK_WRITE_BATCH_SIZE, DB_PATH, SQLITE_CACHE_SIZE_MB, SQLITE_MMAP_SIZE_MB
 
 ALLOWED_INDUSTRIES = (
     "healthcare",
@@ -14,55 +21,22 @@ ALLOWED_INDUSTRIES = (
     "other",
 )
 
-INIT_SQL = """
-CREATE TABLE IF NOT EXISTS newsolvr (
-    uid INTEGER PRIMARY KEY AUTOINCREMENT,
-    title_article TEXT,
-    content_article TEXT,
-    link_article TEXT UNIQUE,
-    published_date TEXT,
-    problem_summary TEXT,
-    problem_statement TEXT,
-    meaningful_problem INTEGER,
-    pain_intensity INTEGER,
-    frequency INTEGER,
-    problem_size TEXT,
-    industry TEXT,
-    market_growth INTEGER,
-    willingness_to_pay INTEGER,
-    target_customer_clarity INTEGER,
-    problem_awareness INTEGER,
-    competition INTEGER,
-    software_solution INTEGER,
-    ai_fit INTEGER,
-    speed_to_mvp INTEGER,
-    business_potential INTEGER,
-    time_relevancy INTEGER,
-    total_score INTEGER,
-    original_score INTEGER
-);
-"""
-
-
-def connect_to_db():
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute(INIT_SQL)
-    conn.commit()
-    try:
-        conn.execute("ALTER TABLE newsolvr ADD COLUMN problem_summary TEXT")
-        conn.commit()
-    except sqlite3.OperationalError:
-        pass  # column already exists
-    try:
-        conn.execute("ALTER TABLE newsolvr ADD COLUMN industry TEXT")
-        conn.commit()
-    except sqlite3.OperationalError:
-        pass  # column already exists
-    try:
-        conn.execute("ALTER TABLE newsolvr ADD COLUMN original_score INTEGER")
-        conn.commit()
-    except sqlite3.OperationalError:
-        pass  # column already exists
+
+def connect_to_db(read_only: bool = False):
+    """Open DB_PATH with the tuned pragmas. The schema is managed by database.migrations (run once at startup).
+
+    read_only=True opens the file with mode=ro, for the web app's long-lived per-thread connections.
+    """
+    if read_only:
+        conn = sqlite3.connect(f"{Path(DB_PATH).resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+    else:
+        # Extractors write from worker threads; every statement goes through the lock below.
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+        # WAL lets the web app read while the pipeline writes; NORMAL sync is durable across app crashes in WAL mode.
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE_MB * 1024 * 1024}")
+    conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_MB * 1024}")
     cur = conn.cursor()
     lock = threading.Lock()
     return {"cur": cur, "conn": conn, "lock": lock}
@@ -81,6 +55,29 @@ def run_query(db_connection, query, params=None):
         conn.commit()
 
 
+def run_many(
+    db_connection, query, rows: Iterable[tuple], batch_size: int = BULK_WRITE_BATCH_SIZE
+) -> tuple[int, int]:
+    """Execute query once per params tuple in rows, in executemany batches of batch_size, inside a single transaction. Returns (changed, ignored): rows the statement changed vs rows it left untouched (e.g. ON CONFLICT DO NOTHING)."""
+    cur = db_connection["cur"]
+    conn = db_connection["conn"]
+    lock = db_connection["lock"]
+
+    changed = total = 0
+    with lock:
+        try:
+            for batch in batched(rows, batch_size):
+                cur.executemany(query, batch)
+                # rowcount counts only rows of the statement's table; total_changes would include trigger writes.
+                changed += max(cur.rowcount, 0)
+                total += len(batch)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return changed, total - changed
+
+
 def get_query(db_connection, query, params=None):
     cur = db_connection["cur"]
     lock = db_connection["lock"]
@@ -97,38 +94,134 @@ def get_query(db_connection, query, params=None):
 
 def close_db(db_connection):
     db_connection["cur"].close()
+    try:
+        db_connection["conn"].execute("PRAGMA optimize")  # refresh planner statistics where they went stale
+    except sqlite3.OperationalError:
+        pass  # read-only connection: statistics cannot be written
     db_connection["conn"].close()
 
 
 def fetch_unanalyzed_articles(db_connection):
-    """Return list of (uid, link_article, content_article) for rows where problem_statement IS NULL."""
+    """Return list of (uid, link_article, title_article, has_content) for rows where problem_statement IS NULL, except those the pre-filter held back. Bodies are not loaded; read them with iter_article_bodies."""
     return get_query(
         db_connection,
-        "SELECT uid, link_article, content_article FROM newsolvr WHERE problem_statement IS NULL",
+        """SELECT n.uid, n.link_article, n.title_article, EXISTS (SELECT 1 FROM article_bodies b WHERE b.uid = n.uid)
+        FROM newsolvr n WHERE n.problem_statement IS NULL AND n.held_back_at IS NULL""",
     )
 
 
+def hold_back_articles(db_connection, uids: Iterable[int]) -> tuple[int, int]:
+    """Record that the pre-filter held back these unanalyzed articles: they leave the analysis backlog and are
+    deleted by the next cleanup."""
+    now = int(datetime.now(timezone.utc).timestamp())
+    return run_many(db_connection, "UPDATE newsolvr SET held_back_at = ? WHERE uid = ?", ((now, uid) for uid in uids))
+
+
+def compress_body(text: str) -> bytes:
+    return zlib.compress(text.encode("utf-8"), 6)
+
+
+def decompress_body(blob: bytes) -> str:
+    return zlib.decompress(blob).decode("utf-8")
+
+
+def iter_article_bodies(
+    db_connection, uids: Iterable[int], batch_size: int = BULK_WRITE_BATCH_SIZE
+) -> Iterator[tuple[int, str | None]]:
+    """Yield (uid, body) for uids in the given order, None where no body is stored; reads batch_size bodies at a time."""
+    for batch in batched(uids, batch_size):
+        rows = get_query(
+            db_connection,
+            f"SELECT uid, body FROM article_bodies WHERE uid IN ({', '.join('?' * len(batch))})",
+            batch,
+        )
+        bodies = dict(rows)
+        for uid in batch:
+            blob = bodies.get(uid)
+            yield uid, decompress_body(blob) if blob is not None else None
+
+
+def insert_articles(db_connection, rows: Iterable[tuple]) -> tuple[int, int]:
+    """Insert (title_article, content, link_article, published_date, published_at) rows in one transaction, skipping
+    known links; the content goes compressed to article_bodies. Returns (inserted, ignored)."""
+    cur = db_connection["cur"]
+    conn = db_connection["conn"]
+    lock = db_connection["lock"]
+
+    inserted = ignored = 0
+    with lock:
+        try:
+            for title, content, link, published_date, published_at in rows:
+                cur.execute(
+                    """INSERT INTO newsolvr (title_article, link_article, published_date, published_at)
+                    VALUES (?, ?, ?, ?) ON CONFLICT (link_article) DO NOTHING RETURNING uid""",
+                    (title, link, published_date, published_at),
+                )
+                row = cur.fetchone()
+                if row is None:
+                    ignored += 1
+                    continue
+                inserted += 1
+                if content and content.strip():
+                    cur.execute("INSERT INTO article_bodies (uid, body) VALUES (?, ?)", (row[0], compress_body(content)))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return inserted, ignored
+
+
+_SEARCH_TERM = re.compile(r"\w+")
+MAX_SEARCH_TERMS = 16
+# Search order: BM25 relevance (negative, lower is better) scaled by total_score, so among equally relevant matches
+# the higher scored problem comes first and a strong score can lift a slightly weaker match.
+SEARCH_RANK_SQL = "bm25(problems_fts) * (n.total_score / 100.0)"
+
+
+def search_query(text: str | None) -> str | None:
+    """FTS5 MATCH expression requiring every word of free text (each quoted, so user input is never FTS syntax)."""
+    terms = _SEARCH_TERM.findall(text or "")[:MAX_SEARCH_TERMS]
+    return " ".join(f'"{term}"' for term in terms) or None
+
+
+def _ranked_filters(problem_size: str | None, industry: str | None) -> tuple[list[str], list[str | int]]:
+    """WHERE conditions and params shared by the ranked-problem queries (columns of newsolvr aliased n)."""
+    conditions = ["n.problem_statement IS NOT NULL", "n.total_score IS NOT NULL", "n.total_score > 85"]
+    params: list[str | int] = []
+    if problem_size in ("niche", "global"):
+        conditions.append("n.problem_size = ?")
+        params.append(problem_size)
+    if industry in ALLOWED_INDUSTRIES:
+        conditions.append("n.industry = ?")
+        params.append(industry)
+    return conditions, params
+
+
 def fetch_top_ranked_problems(
     db_connection,
     limit: int = 20,
     problem_size: str | None = None,
     industry: str | None = None,
+    query: str | None = None,
 ) -> list[dict[str, str | int | None]]:
-    """Return top rows by total_score (desc) with total_score > 85. Each item includes problem_summary, problem_statement, link_article, score, problem_size, industry. Optionally filter by problem_size and/or industry."""
-    conditions = ["problem_statement IS NOT NULL", "total_score IS NOT NULL", "total_score > 85"]
-    params: list[str | int] = []
-    if problem_size in ("niche", "global"):
-        conditions.append("problem_size = ?")
-        params.append(problem_size)
-    if industry in ALLOWED_INDUSTRIES:
-        conditions.append("industry = ?")
-        params.append(industry)
+    """Return top rows by total_score (desc) with total_score > 85. Each item includes problem_summary, problem_statement, link_article, score, problem_size, industry. Optionally filter by problem_size and/or industry. With a search query, only matching rows are returned, best SEARCH_RANK_SQL first."""
+    conditions, params = _ranked_filters(problem_size, industry)
+    match = search_query(query)
+    columns = "n.problem_summary, n.problem_statement, n.link_article, n.total_score, n.problem_size, n.industry"
+    if match:
+        source = "problems_fts JOIN newsolvr n ON n.uid = problems_fts.rowid"
+        conditions.insert(0, "problems_fts MATCH ?")
+        params.insert(0, match)
+        order = f"{SEARCH_RANK_SQL}, n.uid"
+    else:
+        source = "newsolvr n"
+        order = "n.total_score DESC NULLS LAST"
     params.append(limit)
     where = " AND ".join(conditions)
-    query = f"""SELECT problem_summary, problem_statement, link_article, total_score, problem_size, industry FROM newsolvr
+    sql = f"""SELECT {columns} FROM {source}
                    WHERE {where}
-                   ORDER BY total_score DESC NULLS LAST LIMIT ?"""
-    rows = get_query(db_connection, query, tuple(params))
+                   ORDER BY {order} LIMIT ?"""
+    rows = get_query(db_connection, sql, tuple(params))
     return [
         {
             "problem_summary": row[0] or "",
@@ -142,24 +235,105 @@ def fetch_top_ranked_problems(
     ]
 
 
-def update_article_content(db_connection, uid: int, content: str) -> None:
-    """Update content_article for the given uid."""
-    run_query(
+# Columns /api/problems can return; uid and total_score are always included since they form the page cursor.
+PROBLEM_FIELDS = (
+    "uid",
+    "total_score",
+    "title_article",
+    "problem_summary",
+    "problem_statement",
+    "link_article",
+    "published_at",
+    "problem_size",
+    "industry",
+)
+
+
+def fetch_ranked_problems_page(
+    db_connection,
+    limit: int = 50,
+    problem_size: str | None = None,
+    industry: str | None = None,
+    after: tuple[int | float, int] | None = None,
+    fields: Iterable[str] = PROBLEM_FIELDS,
+    query: str | None = None,
+) -> list[dict[str, str | int | float | None]]:
+    """Return up to limit rows with total_score > 85 ordered by (total_score, uid) descending, starting after the
+    (total_score, uid) cursor of the previous page. Keyset pagination: every page is a range scan of the ranked index,
+    however deep, and rows inserted meanwhile do not shift later pages.
+
+    With a search query only matching rows are returned, each with its search_rank, ordered by (search_rank, uid)
+    ascending; after is then the (search_rank, uid) of the previous page's last row.
+    """
+    fields = set(fields)
+    unknown = fields - set(PROBLEM_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {sorted(unknown)}")
+    columns = [column for column in PROBLEM_FIELDS if column in fields or column in ("uid", "total_score")]
+    conditions, params = _ranked_filters(problem_size, industry)
+    match = search_query(query)
+    selected = ", ".join(f"n.{column}" for column in columns)
+    if match:
+        columns.append("search_rank")
+        # The rank is computed per match, so the cursor is applied on the outer query.
+        inner = f"""SELECT {selected}, {SEARCH_RANK_SQL} AS search_rank
+                   FROM problems_fts JOIN newsolvr n ON n.uid = problems_fts.rowid
+                   WHERE problems_fts MATCH ? AND {" AND ".join(conditions)}"""
+        params.insert(0, match)
+        outer = "(search_rank, uid) > (?, ?)" if after is not None else "1"
+        sql = f"SELECT * FROM ({inner}) WHERE {outer} ORDER BY search_rank, uid LIMIT ?"
+    else:
+        if after is not None:
+            conditions.append("(n.total_score, n.uid) < (?, ?)")
+        sql = f"""SELECT {selected} FROM newsolvr n WHERE {" AND ".join(conditions)}
+                   ORDER BY n.total_score DESC, n.uid DESC LIMIT ?"""
+    if after is not None:
+        params.extend(after)
+    params.append(limit)
+    return [dict(zip(columns, row)) for row in get_query(db_connection, sql, tuple(params))]
+
+
+def update_articles_content(db_connection, items: Iterable[tuple[int, str]]) -> tuple[int, int]:
+    """Store the (compressed) body for (uid, content) pairs in one transaction, replacing any previous body."""
+    return run_many(
         db_connection,
-        "UPDATE newsolvr SET content_article = ? WHERE uid = ?",
-        (content, uid),
+        "INSERT OR REPLACE INTO article_bodies (uid, body) VALUES (?, ?)",
+        ((uid, compress_body(content)) for uid, content in items),
     )
 
 
-def save_article_analysis(db_connection, uid: int, report: dict) -> None:
-    """Saves an LLM-analyzed article to the database."""
+def _analysis_params(uid: int, report: dict) -> tuple:
     problem_size = report["problem_size"]
     if isinstance(problem_size, str):
         problem_size = problem_size.strip().lower()
     industry = report["industry"]
     if isinstance(industry, str):
         industry = industry.strip().lower().replace(" ", "_")
-    run_query(
+    return (
+        report["problem_summary"],
+        report["problem_statement"],
+        report["meaningful_problem"],
+        report["pain_intensity"],
+        report["frequency"],
+        problem_size,
+        industry,
+        report["market_growth"],
+        report["willingness_to_pay"],
+        report["target_customer_clarity"],
+        report["problem_awareness"],
+        report["differentiation_potential"],
+        report["software_solution"],
+        report["ai_fit"],
+        report["speed_to_mvp"],
+        report["business_potential"],
+        report["time_relevancy"],
+        uid,
+    )
+
+
+def save_articles_analysis(db_connection, items: Iterable[tuple[int, dict]]) -> tuple[int, int]:
+    """Saves LLM-analyzed articles ((uid, report) pairs) to the database in one transaction."""
+    return run_many(
         db_connection,
         """UPDATE newsolvr SET
             problem_summary = ?, problem_statement = ?, meaningful_problem = ?, pain_intensity = ?,
@@ -168,24 +342,99 @@ def save_article_analysis(db_connection, uid: int, report: dict) -> None:
             software_solution = ?, ai_fit = ?, speed_to_mvp = ?,
             business_potential = ?, time_relevancy = ?
         WHERE uid = ?""",
-        (
-            report["problem_summary"],
-            report["problem_statement"],
-            report["meaningful_problem"],
-            report["pain_intensity"],
-            report["frequency"],
-            problem_size,
-            industry,
-            report["market_growth"],
-            report["willingness_to_pay"],
-            report["target_customer_clarity"],
-            report["problem_awareness"],
-            report["differentiation_potential"],
-            report["software_solution"],
-            report["ai_fit"],
-            report["speed_to_mvp"],
-            report["business_potential"],
-            report["time_relevancy"],
-            uid,
-        ),
+        (_analysis_params(uid, report) for uid, report in items),
+    )
+
+
+def get_extraction_state(db_connection, source: str, query: str) -> tuple[str | None, str | None]:
+    """Return (watermark, cursor) stored for source and query, or (None, None) on the first run."""
+    rows = get_query(
+        db_connection,
+        "SELECT watermark, cursor FROM extraction_state WHERE source = ? AND query = ?",
+        (source, query),
+    )
+    return rows[0] if rows else (None, None)
+
+
+def save_extraction_state(db_connection, source: str, query: str, watermark: str, cursor: str) -> None:
+    """Upsert the watermark and resume cursor for source and query."""
+    run_query(
+        db_connection,
+        """INSERT INTO extraction_state (source, query, watermark, cursor, updated_at)
+        VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT (source, query) DO UPDATE SET
+            watermark = excluded.watermark, cursor = excluded.cursor, updated_at = excluded.updated_at""",
+        (source, query, watermark, cursor),
+    )
+
+
+def add_llm_usage(db_connection, day: str, requests: int, tokens: int) -> int:
+    """Add requests/tokens to the usage counters of day and return that day's request total."""
+    cur = db_connection["cur"]
+    conn = db_connection["conn"]
+    lock = db_connection["lock"]
+
+    with lock:
+        cur.execute(
+            """INSERT INTO llm_usage (day, requests, tokens) VALUES (?, ?, ?)
+            ON CONFLICT (day) DO UPDATE SET
+                requests = requests + excluded.requests, tokens = tokens + excluded.tokens""",
+            (day, requests, tokens),
+        )
+        cur.execute("SELECT requests FROM llm_usage WHERE day = ?", (day,))
+        (total,) = cur.fetchone()
+        conn.commit()
+    return total
+
+
+def get_cached_analyses(db_connection, content_hashes: Iterable[str]) -> dict[str, dict]:
+    """Return {content_hash: report} for the hashes present in analysis_cache."""
+    found = {}
+    for chunk in batched(content_hashes, BULK_WRITE_BATCH_SIZE):
+        rows = get_query(
+            db_connection,
+            f"SELECT content_hash, report FROM analysis_cache WHERE content_hash IN ({', '.join('?' * len(chunk))})",
+            chunk,
+        )
+        found.update((content_hash, json.loads(report)) for content_hash, report in rows)
+    return found
+
+
+def save_cached_analyses(db_connection, items: Iterable[tuple[str, dict]]) -> tuple[int, int]:
+    """Store (content_hash, report) pairs in analysis_cache, replacing older reports for the same hash."""
+    return run_many(
+        db_connection,
+        "INSERT OR REPLACE INTO analysis_cache (content_hash, report) VALUES (?, ?)",
+        ((content_hash, json.dumps(report)) for content_hash, report in items),
+    )
+
+
+def collect_prefilter_examples(db_connection, max_content_chars: int = 5000) -> list[tuple[int, str | None, str, int]]:
+    """Return (uid, title_article, start of content, original_score) of scored articles not yet in prefilter_examples. Read-only."""
+    rows = get_query(
+        db_connection,
+        """SELECT uid, title_article, original_score FROM newsolvr n WHERE original_score IS NOT NULL
+        AND NOT EXISTS (SELECT 1 FROM prefilter_examples p WHERE p.uid = n.uid)""",
+    )
+    bodies = dict(iter_article_bodies(db_connection, [uid for uid, _title, _score in rows]))
+    return [(uid, title, (bodies[uid] or "")[:max_content_chars], score) for uid, title, score in rows]
+
+
+def record_prefilter_examples(db_connection, max_content_chars: int = 5000) -> None:
+    """Copy newly scored articles (title, start of content, original_score) into prefilter_examples."""
+    # Collected before writing: run_many holds the connection lock while it consumes its rows.
+    examples = collect_prefilter_examples(db_connection, max_content_chars)
+    run_many(
+        db_connection,
+        """INSERT OR IGNORE INTO prefilter_examples (uid, title_article, content_article, original_score)
+        VALUES (?, ?, ?, ?)""",
+        examples,
+    )
+
+
+def fetch_prefilter_examples(db_connection):
+    """Return list of (uid, title_article, content_article, original_score) labelled pre-filter examples."""
+    return get_query(
+        db_connection,
+        "SELECT uid, title_article, content_article, original_score FROM prefilter_examples ORDER BY uid",
     )
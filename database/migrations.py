@@ -0,0 +1,292 @@
+"""Versioned schema migrations. The applied version is kept in PRAGMA user_version; migrate() runs at startup."""
+
+import sqlite3
+from typing import Callable
+
+from database.db_utils import close_db, compress_body, connect_to_db
+from utils.date_parsing import published_epoch
+
+NEWSOLVR_SQL = """
+CREATE TABLE IF NOT EXISTS newsolvr (
+    uid INTEGER PRIMARY KEY AUTOINCREMENT,
+    title_article TEXT,
+    content_article TEXT,
+    link_article TEXT UNIQUE,
+    published_date TEXT,
+    problem_summary TEXT,
+    problem_statement TEXT,
+    meaningful_problem INTEGER,
+    pain_intensity INTEGER,
+    frequency INTEGER,
+    problem_size TEXT,
+    industry TEXT,
+    market_growth INTEGER,
+    willingness_to_pay INTEGER,
+    target_customer_clarity INTEGER,
+    problem_awareness INTEGER,
+    competition INTEGER,
+    software_solution INTEGER,
+    ai_fit INTEGER,
+    speed_to_mvp INTEGER,
+    business_potential INTEGER,
+    time_relevancy INTEGER,
+    total_score INTEGER,
+    original_score INTEGER
+)"""
+
+# Per source and search query: last ingested timestamp and the windows finished beyond it (JSON).
+EXTRACTION_STATE_SQL = """
+CREATE TABLE IF NOT EXISTS extraction_state (
+    source TEXT NOT NULL,
+    query TEXT NOT NULL,
+    watermark TEXT,
+    cursor TEXT,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (source, query)
+)"""
+
+# Gemini requests/tokens spent per quota day, so the daily limit survives restarts.
+LLM_USAGE_SQL = """
+CREATE TABLE IF NOT EXISTS llm_usage (
+    day TEXT PRIMARY KEY,
+    requests INTEGER NOT NULL DEFAULT 0,
+    tokens INTEGER NOT NULL DEFAULT 0
+)"""
+
+# LLM reports keyed by a hash of normalized article text + prompt/model version. Outlives newsolvr rows, so a
+# re-ingested or syndicated copy of an already analyzed (even already deleted) article is not paid for again.
+ANALYSIS_CACHE_SQL = """
+CREATE TABLE IF NOT EXISTS analysis_cache (
+    content_hash TEXT PRIMARY KEY,
+    report TEXT NOT NULL,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+)"""
+
+# Scored articles kept as pre-filter training data; cleanup deletes most of them from newsolvr.
+PREFILTER_EXAMPLES_SQL = """
+CREATE TABLE IF NOT EXISTS prefilter_examples (
+    uid INTEGER PRIMARY KEY,
+    title_article TEXT,
+    content_article TEXT,
+    original_score INTEGER NOT NULL,
+    recorded_at TEXT DEFAULT CURRENT_TIMESTAMP
+)"""
+
+# Near-duplicate index: the bands of each canonical article's 64-bit SimHash (newsolvr.simhash).
+SIMHASH_BANDS_SQL = """
+CREATE TABLE IF NOT EXISTS simhash_bands (
+    band INTEGER NOT NULL,
+    value INTEGER NOT NULL,
+    uid INTEGER NOT NULL,
+    PRIMARY KEY (band, value, uid)
+) WITHOUT ROWID"""
+
+SIMHASH_BANDS_TRIGGER_SQL = """
+CREATE TRIGGER IF NOT EXISTS newsolvr_simhash_bands_ad AFTER DELETE ON newsolvr BEGIN
+    DELETE FROM simhash_bands WHERE uid = old.uid;
+END"""
+
+# Hot read paths: the analysis backlog (problem_statement IS NULL) and the frontend's top problems
+# (total_score > 85, optionally by problem_size or industry, ORDER BY total_score DESC). Partial indexes keep
+# them to the rows those queries can return.
+ACCESS_PATH_INDEX_SQL = (
+    "CREATE INDEX IF NOT EXISTS idx_newsolvr_unanalyzed ON newsolvr (uid) WHERE problem_statement IS NULL",
+    """CREATE INDEX IF NOT EXISTS idx_newsolvr_ranked ON newsolvr (total_score)
+    WHERE total_score > 85 AND problem_statement IS NOT NULL""",
+    """CREATE INDEX IF NOT EXISTS idx_newsolvr_ranked_size ON newsolvr (problem_size, total_score)
+    WHERE total_score > 85 AND problem_statement IS NOT NULL""",
+    """CREATE INDEX IF NOT EXISTS idx_newsolvr_ranked_industry ON newsolvr (industry, total_score)
+    WHERE total_score > 85 AND problem_statement IS NOT NULL""",
+)
+
+# Full-text index over the problem texts, reading its content from newsolvr (external content: no second copy).
+# External-content FTS5 tables are not updated by SQLite itself; the triggers below keep it in step.
+PROBLEMS_FTS_SQL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS problems_fts USING fts5(
+    title_article, problem_summary, problem_statement,
+    content='newsolvr', content_rowid='uid', tokenize='porter unicode61 remove_diacritics 2'
+)"""
+
+PROBLEMS_FTS_TRIGGER_SQL = (
+    """CREATE TRIGGER IF NOT EXISTS newsolvr_fts_ai AFTER INSERT ON newsolvr BEGIN
+    INSERT INTO problems_fts (rowid, title_article, problem_summary, problem_statement)
+    VALUES (new.uid, new.title_article, new.problem_summary, new.problem_statement);
+END""",
+    """CREATE TRIGGER IF NOT EXISTS newsolvr_fts_ad AFTER DELETE ON newsolvr BEGIN
+    INSERT INTO problems_fts (problems_fts, rowid, title_article, problem_summary, problem_statement)
+    VALUES ('delete', old.uid, old.title_article, old.problem_summary, old.problem_statement);
+END""",
+    """CREATE TRIGGER IF NOT EXISTS newsolvr_fts_au
+AFTER UPDATE OF title_article, problem_summary, problem_statement ON newsolvr BEGIN
+    INSERT INTO problems_fts (problems_fts, rowid, title_article, problem_summary, problem_statement)
+    VALUES ('delete', old.uid, old.title_article, old.problem_summary, old.problem_statement);
+    INSERT INTO problems_fts (rowid, title_article, problem_summary, problem_statement)
+    VALUES (new.uid, new.title_article, new.problem_summary, new.problem_statement);
+END""",
+)
+
+# Article bodies (zlib-compressed UTF-8), kept out of newsolvr so scans of the scored rows stay small. Only the
+# scraping, deduplication and analysis stages read them.
+ARTICLE_BODIES_SQL = """
+CREATE TABLE IF NOT EXISTS article_bodies (
+    uid INTEGER PRIMARY KEY,
+    body BLOB NOT NULL
+)"""
+
+ARTICLE_BODIES_TRIGGER_SQL = """
+CREATE TRIGGER IF NOT EXISTS newsolvr_article_bodies_ad AFTER DELETE ON newsolvr BEGIN
+    DELETE FROM article_bodies WHERE uid = old.uid;
+END"""
+
+
+def _add_column(conn: sqlite3.Connection, table: str, column: str, declaration: str) -> bool:
+    """Add column unless it exists (databases created before versioning may have it). Returns True if added."""
+    if any(row[1] == column for row in conn.execute(f"PRAGMA table_info({table})")):
+        return False
+    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+    return True
+
+
+def _base_schema(conn: sqlite3.Connection) -> None:
+    for statement in (NEWSOLVR_SQL, EXTRACTION_STATE_SQL, LLM_USAGE_SQL, ANALYSIS_CACHE_SQL, PREFILTER_EXAMPLES_SQL):
+        conn.execute(statement)
+    # Columns added after the first deployments.
+    _add_column(conn, "newsolvr", "problem_summary", "TEXT")
+    _add_column(conn, "newsolvr", "industry", "TEXT")
+    _add_column(conn, "newsolvr", "original_score", "INTEGER")
+
+
+def _near_duplicate_index(conn: sqlite3.Connection) -> None:
+    _add_column(conn, "newsolvr", "simhash", "INTEGER")
+    conn.execute(SIMHASH_BANDS_SQL)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_simhash_bands_uid ON simhash_bands (uid)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_newsolvr_title ON newsolvr (title_article)")
+    conn.execute(SIMHASH_BANDS_TRIGGER_SQL)
+
+
+def _incremental_scoring(conn: sqlite3.Connection) -> None:
+    # next_decay_at: epoch second at which the row's timeliness multiplier next drops.
+    if _add_column(conn, "newsolvr", "next_decay_at", "INTEGER"):
+        # Existing scores carry no decay time: clear them so the next scoring run rescores those rows once.
+        conn.execute("UPDATE newsolvr SET original_score = NULL WHERE problem_statement IS NOT NULL")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_newsolvr_original_score ON newsolvr (original_score)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_newsolvr_next_decay ON newsolvr (next_decay_at)")
+
+
+def _published_at(conn: sqlite3.Connection) -> None:
+    # published_at: published_date normalized to UTC epoch seconds; new rows get it at ingest.
+    if _add_column(conn, "newsolvr", "published_at", "INTEGER"):
+        conn.create_function("published_epoch", 1, published_epoch, deterministic=True)
+        conn.execute("UPDATE newsolvr SET published_at = published_epoch(published_date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_newsolvr_published_at ON newsolvr (published_at)")
+
+
+def _access_path_indexes(conn: sqlite3.Connection) -> None:
+    for statement in ACCESS_PATH_INDEX_SQL:
+        conn.execute(statement)
+
+
+def _problem_search(conn: sqlite3.Connection) -> None:
+    conn.execute(PROBLEMS_FTS_SQL)
+    for statement in PROBLEMS_FTS_TRIGGER_SQL:
+        conn.execute(statement)
+    # Index the rows that predate the triggers.
+    conn.execute("INSERT INTO problems_fts (problems_fts) VALUES ('rebuild')")
+
+
+def _article_bodies(conn: sqlite3.Connection) -> None:
+    conn.execute(ARTICLE_BODIES_SQL)
+    conn.execute(ARTICLE_BODIES_TRIGGER_SQL)
+    if any(row[1] == "content_article" for row in conn.execute("PRAGMA table_info(newsolvr)")):
+        conn.create_function("compress_body", 1, compress_body, deterministic=True)
+        conn.execute(
+            """INSERT OR REPLACE INTO article_bodies (uid, body)
+            SELECT uid, compress_body(content_article) FROM newsolvr
+            WHERE content_article IS NOT NULL AND trim(content_article) != ''"""
+        )
+        # Rewrites newsolvr without the bodies; the file itself only shrinks after `python -m pipeline vacuum`.
+        conn.execute("ALTER TABLE newsolvr DROP COLUMN content_article")
+
+
+def _simhash_band_layout(conn: sqlite3.Connection) -> None:
+    # Fingerprints moved to 2-word shingles and 8 bands of 8 bits: stored values no longer compare, so every row is
+    # re-fingerprinted by the next deduplication run.
+    conn.execute("DELETE FROM simhash_bands")
+    conn.execute("UPDATE newsolvr SET simhash = NULL")
+
+
+def _title_window_index(conn: sqlite3.Connection) -> None:
+    # The same-title duplicate lookup filters on title_article and a published_at window; one composite index
+    # serves it (replacing the title index and the published_at index no query used).
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_newsolvr_title_published ON newsolvr (title_article, published_at)")
+    conn.execute("DROP INDEX IF EXISTS idx_newsolvr_title")
+    conn.execute("DROP INDEX IF EXISTS idx_newsolvr_published_at")
+
+
+def _simhash_key_tables(conn: sqlite3.Connection) -> None:
+    # Band keys changed to combinations of 3 of 10 blocks (18+ bits each): stored keys no longer match lookups, so
+    # every row is re-fingerprinted and re-indexed by the next deduplication run.
+    conn.execute("DELETE FROM simhash_bands")
+    conn.execute("UPDATE newsolvr SET simhash = NULL")
+
+
+def _prefilter_decisions(conn: sqlite3.Connection) -> None:
+    # held_back_at: epoch second the pre-filter held the unanalyzed row back; such rows leave the analysis backlog
+    # (and its partial index) and are deleted by cleanup like low-scored ones.
+    _add_column(conn, "newsolvr", "held_back_at", "INTEGER")
+    conn.execute("DROP INDEX IF EXISTS idx_newsolvr_unanalyzed")
+    conn.execute(
+        "CREATE INDEX idx_newsolvr_unanalyzed ON newsolvr (uid) WHERE problem_statement IS NULL AND held_back_at IS NULL"
+    )
+
+
+# Append only: the schema version of a database is the number of these it has applied.
+MIGRATIONS: list[Callable[[sqlite3.Connection], None]] = [
+    _base_schema,
+    _near_duplicate_index,
+    _incremental_scoring,
+    _published_at,
+    _access_path_indexes,
+    _problem_search,
+    _article_bodies,
+    _simhash_band_layout,
+    _title_window_index,
+    _simhash_key_tables,
+    _prefilter_decisions,
+]
+
+
+def migrate(db_connection) -> int:
+    """Apply pending migrations, each in its own IMMEDIATE transaction, and return the schema version.
+
+    The version is re-read inside the write lock, so concurrent starts (several web workers, a pipeline run)
+    apply each migration exactly once. Migrations are idempotent, so databases created before versioning
+    (user_version 0 but tables present) upgrade cleanly.
+    """
+    conn = db_connection["conn"]
+    with db_connection["lock"]:
+        (version,) = conn.execute("PRAGMA user_version").fetchone()
+        for target, migration in enumerate(MIGRATIONS, start=1):
+            if version >= target:
+                continue
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                (version,) = conn.execute("PRAGMA user_version").fetchone()
+                if version < target:
+                    migration(conn)
+                    conn.execute(f"PRAGMA user_version = {target}")
+                    version = target
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+    return version
+
+
+def migrate_db() -> int:
+    """Open the configured database, bring its schema up to date and close it again."""
+    db = connect_to_db()
+    try:
+        return migrate(db)
+    finally:
+        close_db(db)
@@ -1,4 +1,52 @@
-from pipeline.run import pipeline
+import argparse
+
+from database import close_db, connect_to_db, migrate_db, run_query
+from pipeline.run import pipeline, run_article_scoring_pipeline
+from pipeline.scripts import prefilter
+
+
+def run_vacuum_command():
+    conn = connect_to_db()
+    try:
+        run_query(conn, "VACUUM")
+        print("Database vacuumed.")
+    finally:
+        close_db(conn)
+
+
+def run_prefilter_command(command: str):
+    conn = connect_to_db(read_only=command == "evaluate")
+    try:
+        if command == "train":
+            prefilter.train(conn)
+        else:
+            prefilter.evaluate(conn)
+    finally:
+        close_db(conn)
+
 
 if __name__ == "__main__":
-    pipeline()
+    parser = argparse.ArgumentParser(prog="python -m pipeline")
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="analyze the unanalyzed backlog with the Gemini Batch API (cheaper, results within hours) instead of live calls",
+    )
+    commands = parser.add_subparsers(dest="command")
+    prefilter_parser = commands.add_parser("prefilter", help="train or evaluate the local pre-filter model")
+    prefilter_parser.add_argument("action", choices=("train", "evaluate"))
+    commands.add_parser("rescore", help="recompute every score (e.g. after changing SCORE_WEIGHTS)")
+    commands.add_parser("migrate", help="only bring the database schema up to date")
+    commands.add_parser("vacuum", help="rebuild the database file to return freed space (e.g. after a migration)")
+    args = parser.parse_args()
+    version = migrate_db()
+    if args.command == "migrate":
+        print(f"Database schema at version {version}.")
+    elif args.command == "vacuum":
+        run_vacuum_command()
+    elif args.command == "prefilter":
+        run_prefilter_command(args.action)
+    elif args.command == "rescore":
+        run_article_scoring_pipeline(rescore_all=True)
+    else:
+        pipeline(batch=args.batch)
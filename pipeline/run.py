@@ -1,150 +1,147 @@
-import time
+from concurrent.futures import ThreadPoolExecutor
 
-from config.config import LLM_RATE_LIMIT_RPD, LLM_RATE_LIMIT_RPM, SCRAPE_DELAY_SECONDS
+from config.config import BULK_WRITE_BATCH_SIZE, LLM_MODEL, SCORE_WEIGHTS, SNAPSHOT_DIR
 from database import (
     close_db,
     connect_to_db,
     fetch_unanalyzed_articles,
-    get_query,
+    hold_back_articles,
+    iter_article_bodies,
+    record_prefilter_examples,
+    run_many,
     run_query,
-    save_article_analysis,
-    update_article_content,
+    save_articles_analysis,
+    update_articles_content,
 )
+from pipeline.scripts.analysis_cache import AnalysisCache
 from pipeline.scripts.guardian_api import guardian_api_extraction_pipeline
-from pipeline.scripts.llm_functions import analyze_article
-from pipeline.scripts.news_api import (
-    extract_article_text,
-    fetch_article_html,
-    news_api_extraction_pipeline,
-)
-from pipeline.scripts.pipeline_dataclasses import NUMERIC_SCORE_COLUMNS
-from pipeline.scripts.timeliness_functions import timeliness_score
+from pipeline.scripts.llm_batch import BatchBackend, GeminiBatchBackend, analyze_articles_in_batches
+from pipeline.scripts.llm_functions import ProblemAnalyzer, analyze_articles_concurrently, fetch_prompt
+from pipeline.scripts.near_duplicates import index_new_articles
+from pipeline.scripts.news_api import news_api_extraction_pipeline
+from pipeline.scripts.prefilter import load_model as load_prefilter_model, prioritize
+from pipeline.scripts.rate_limiter import LlmRateLimiter
+from pipeline.scripts.scoring import score_articles
+from pipeline.scripts.scraper import extract_texts, scrape_articles
 from pipeline.scripts.times_api import times_api_extraction_pipeline
 from utils.pipeline_error_handling import handle_pipeline_errors
 
 SEARCH_TOPIC = "technology OR tech OR software OR automation OR artificial intelligence"
 
 
+EXTRACTION_PIPELINES = (
+    news_api_extraction_pipeline,
+    guardian_api_extraction_pipeline,
+    times_api_extraction_pipeline,
+)
+
+
 @handle_pipeline_errors
-def run_article_extraction_pipeline(search_topic: str = SEARCH_TOPIC):
-    news_api_extraction_pipeline(search_topic)
-    guardian_api_extraction_pipeline(search_topic)
-    times_api_extraction_pipeline(search_topic)
+def run_article_extraction_pipeline(search_topic: str = SEARCH_TOPIC, concurrent: bool = True):
+    """Run all source extractors. With concurrent=True the sources run side by side (each with its own connection and per-source request limit), so wall time is bounded by the slowest source; a failing source is logged without stopping the others."""
+    if not concurrent:
+        for extraction_pipeline in EXTRACTION_PIPELINES:
+            extraction_pipeline(search_topic)
+        return
+    with ThreadPoolExecutor(max_workers=len(EXTRACTION_PIPELINES)) as executor:
+        for extraction_pipeline in EXTRACTION_PIPELINES:
+            executor.submit(handle_pipeline_errors(extraction_pipeline), search_topic)
 
 
 @handle_pipeline_errors
 def run_deduplication_pipeline():
-    """Remove duplicate articles (same title_article) in the last 3 days, keeping the earliest by published_date."""
+    """Remove near-duplicate articles (syndicated copies, lightly rewritten stories, same title within 3 days) before they are scraped or analyzed. Newly ingested rows are SimHash-fingerprinted and looked up in the band index; the earliest article of each cluster is kept."""
     conn = connect_to_db()
-    run_query(
-        conn,
-        """DELETE FROM newsolvr WHERE date(published_date) >= date('now', '-3 days') AND uid IN (
-            SELECT uid FROM (
-                SELECT uid, ROW_NUMBER() OVER (PARTITION BY title_article ORDER BY published_date ASC) AS rn
-                FROM newsolvr WHERE date(published_date) >= date('now', '-3 days')
-            ) WHERE rn > 1
-        )""",
-    )
-    print("Pipeline complete: deduplication based on article titles.")
-    close_db(conn)
+    try:
+        duplicates = index_new_articles(conn)
+        run_many(conn, "DELETE FROM newsolvr WHERE uid = ?", ((uid,) for uid, _canonical in duplicates))
+        print(f"Pipeline complete: removed {len(duplicates)} near-duplicate articles.")
+    finally:
+        close_db(conn)
 
 
 @handle_pipeline_errors
 def run_html_extraction_pipeline():
-    """Fetch HTML from link_article URLs for unanalyzed articles missing content; extract main text with trafilatura and update content_article."""
+    """Fetch HTML from link_article URLs for unanalyzed articles missing content; extract main text with trafilatura and store it in article_bodies. Hosts are scraped in parallel with a politeness delay per host, and extraction runs on a process pool alongside the fetching."""
     conn = connect_to_db()
     rows = fetch_unanalyzed_articles(conn)
-    count = 0
-    for uid, link, content in rows:
-        if content and content.strip():
-            continue
-        html = fetch_article_html(link)
-        if html is None:
-            continue
-        text = extract_article_text(html)
-        if text:
-            update_article_content(conn, uid, text)
-            count += 1
-        time.sleep(SCRAPE_DELAY_SECONDS)
+    to_scrape = [(uid, link) for uid, link, _title, has_content in rows if not has_content]
+    pending = []
+    try:
+        for uid, text in extract_texts(scrape_articles(to_scrape)):
+            if text:
+                pending.append((uid, text))
+            if len(pending) >= BULK_WRITE_BATCH_SIZE:
+                update_articles_content(conn, pending)
+                pending.clear()
+    finally:
+        update_articles_content(conn, pending)
+        close_db(conn)
     print("Pipeline complete: extend content for articles in database.")
-    close_db(conn)
 
 
 @handle_pipeline_errors
-def run_article_analysis_pipeline():
-    """Fetch unanalyzed articles from the database, analyze each article with LLM, and save to database. This pipeline build on the extracted documents form News API scores them using Gemini LLMs."""
+def run_article_analysis_pipeline(batch: bool = False, batch_backend: BatchBackend | None = None):
+    """Fetch unanalyzed articles from the database, analyze each article with LLM, and save to database. This pipeline build on the extracted documents form News API scores them using Gemini LLMs. Articles whose text was analyzed before (same normalized text, prompt and model) reuse the cached report; the rest are ordered by the local pre-filter (if trained), which also holds back unlikely ones, and run concurrently under a joint RPM/TPM/RPD token-bucket limiter, or with batch=True as batch prediction jobs (batch_backend defaults to the Gemini Batch API)."""
     conn = connect_to_db()
-    articles = fetch_unanalyzed_articles(conn)
+    rows = fetch_unanalyzed_articles(conn)
+    titles = {uid: title for uid, _link, title, _has_content in rows}
+    cache = AnalysisCache(conn, fetch_prompt(), LLM_MODEL)
+    # Bodies are streamed from article_bodies in batches: hashing and ranking keep only uids, and the texts are
+    # loaded again just before their LLM calls.
+    uids = [uid for uid, _link, _title, _has_content in rows]
+    cached, to_analyze = cache.partition(iter_article_bodies(conn, uids))
+    model = load_prefilter_model()
+    ranked = to_analyze
+    if model is not None:
+        ranked = prioritize(
+            ((uid, titles[uid], content) for uid, content in iter_article_bodies(conn, to_analyze)), model
+        )
+    if len(ranked) < len(to_analyze):
+        kept = set(ranked)
+        held_back = [uid for uid in to_analyze if uid not in kept]
+        hold_back_articles(conn, (same_text_uid for uid in held_back for same_text_uid in cache.discard(uid)))
+        print(f"Pre-filter held back {len(held_back)} unlikely articles")
+    articles = iter_article_bodies(conn, ranked)
+    analyzer = None
     count = 0
+    pending = list(cached)
 
-    for uid, _link, content in articles:
-        if count >= LLM_RATE_LIMIT_RPD:
-            break
-        report = analyze_article(content)
-        save_article_analysis(conn, uid, report)
-        count += 1
-        print(f"Analysis complete for: article {count}")
-        time.sleep(60 / LLM_RATE_LIMIT_RPM)
+    def flush():
+        save_articles_analysis(conn, pending)
+        cache.flush()
+        pending.clear()
+
+    try:
+        if cached:
+            print(f"Reused cached analysis for {len(cached)} articles")
+        if batch:
+            reports = analyze_articles_in_batches(articles, batch_backend or GeminiBatchBackend())
+        else:
+            analyzer = ProblemAnalyzer()
+            reports = analyze_articles_concurrently(articles, LlmRateLimiter(conn), analyzer.analyze)
+        for uid, report in reports:
+            pending.extend((same_text_uid, report) for same_text_uid in cache.store(uid, report))
+            count += 1
+            print(f"Analysis complete for: article {count}")
+            if len(pending) >= BULK_WRITE_BATCH_SIZE:
+                flush()
+    finally:
+        # Reports are paid for; write whatever was analyzed even if a later call failed.
+        flush()
+        if analyzer is not None:
+            analyzer.close()
+        close_db(conn)
 
     print("Pipeline complete: analyze news articles with Gemini.")
-    close_db(conn)
 
 
 @handle_pipeline_errors
-def run_article_scoring_pipeline(params=None):
-    """Score each article on 100: weighted score based on different subscores in database."""
-    if params is None:
-        params = NUMERIC_SCORE_COLUMNS
-
-    cols = ", ".join(params)
+def run_article_scoring_pipeline(weights=None, rescore_all: bool = False):
+    """Score each article on 100: weighted score based on different subscores in database. Weights default to SCORE_WEIGHTS. One set-based UPDATE scores new articles and rescores only those whose timeliness step changed since the last run; pass rescore_all=True after changing the weights."""
     conn = connect_to_db()
     try:
-        rows = get_query(
-            conn,
-            f"SELECT uid, {cols}, published_date FROM newsolvr WHERE problem_statement IS NOT NULL",
-        )
-        for row in rows:
-            uid = row[0]
-            meaningful_problem = int(row[1])
-            pain_intensity = int(row[2])
-            frequency = int(row[3])
-            market_growth = int(row[4])
-            willingness_to_pay = int(row[5])
-            target_customer_clarity = int(row[6])
-            problem_awareness = int(row[7])
-            competition = int(row[8])
-            software_solution = int(row[9])
-            ai_fit = int(row[10])
-            speed_to_mvp = int(row[11])
-            business_potential = int(row[12])
-            time_relevancy = int(row[13])
-            published_date = row[14]
-
-            score_without_timeliness = 0.0
-            score_without_timeliness += meaningful_problem * 5
-            score_without_timeliness += pain_intensity * 2
-            score_without_timeliness += frequency * 1
-            score_without_timeliness += market_growth * 3
-            score_without_timeliness += willingness_to_pay * 1
-            score_without_timeliness += target_customer_clarity * 1
-            score_without_timeliness += problem_awareness * 1
-            score_without_timeliness += competition * 1
-            score_without_timeliness += software_solution * 2
-            score_without_timeliness += ai_fit * 2
-            score_without_timeliness += speed_to_mvp * 3
-            score_without_timeliness += business_potential * 1
-            score_without_timeliness += time_relevancy * 1
-            # total weights without timeliness = 24
-
-            score = score_without_timeliness * timeliness_score(published_date)
-
-            original_score = round((score_without_timeliness / (24 * 5)) * 100)
-            final_score = round((score / (24 * 5)) * 100)
-            run_query(
-                conn,
-                "UPDATE newsolvr SET original_score = ?, total_score = ? WHERE uid = ?",
-                (original_score, final_score, uid),
-            )
+        score_articles(conn, SCORE_WEIGHTS if weights is None else weights, rescore_all=rescore_all)
         print("Pipeline complete: score articles.")
     finally:
         close_db(conn)
@@ -152,23 +149,40 @@ def run_article_scoring_pipeline(params=None):
 
 @handle_pipeline_errors
 def run_database_cleanup_pipeline():
-    """Remove all rows with original_score < 85 so the database keeps only high-value problems."""
+    """Remove all rows with original_score < 85, and those the pre-filter held back, so the database keeps only high-value problems. Scored rows are first copied to prefilter_examples as pre-filter training labels."""
     conn = connect_to_db()
     try:
+        record_prefilter_examples(conn)
         run_query(
             conn,
-            "DELETE FROM newsolvr WHERE original_score IS NOT NULL AND original_score < 85",
+            "DELETE FROM newsolvr WHERE (original_score IS NOT NULL AND original_score < 85) OR held_back_at IS NOT NULL",
         )
         print("Pipeline complete: database cleanup.")
     finally:
         close_db(conn)
 
 
-def pipeline():
-    """Pipeline that pulls news articles into database based on current_article_topic and performs LLM-based scoring for relevant problems."""
+@handle_pipeline_errors
+def run_snapshot_pipeline():
+    """Pre-render the index page (plus gzip/brotli variants and a JSON twin) for every problem_size/industry filter into SNAPSHOT_DIR, so a front proxy or the app can serve the ranking without querying SQLite. Files are replaced atomically and only when their content changed."""
+    if not SNAPSHOT_DIR:
+        return
+    from app import write_index_snapshot  # importing app builds the web app (and migrates), so only on this stage
+
+    conn = connect_to_db()
+    try:
+        written = write_index_snapshot(conn, SNAPSHOT_DIR)
+        print(f"Pipeline complete: static snapshot ({written} files updated).")
+    finally:
+        close_db(conn)
+
+
+def pipeline(batch: bool = False):
+    """Pipeline that pulls news articles into database based on current_article_topic and performs LLM-based scoring for relevant problems. batch=True runs the analysis step through the Batch API."""
     run_article_extraction_pipeline()
     run_deduplication_pipeline()
     run_html_extraction_pipeline()
-    run_article_analysis_pipeline()
+    run_article_analysis_pipeline(batch=batch)
     run_article_scoring_pipeline()
     run_database_cleanup_pipeline()
+    run_snapshot_pipeline()
@@ -0,0 +1,79 @@
+"""Content-addressed cache of LLM analyses, so identical article text (syndicated or re-ingested) is analyzed once."""
+
+import hashlib
+import unicodedata
+from collections import defaultdict
+from typing import Iterable
+
+from database import get_cached_analyses, save_cached_analyses
+
+
+def normalize_text(text: str) -> str:
+    """Unicode-normalize, casefold and collapse whitespace, so copies differing only in formatting hash alike."""
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+class AnalysisCache:
+    """Looks up and records reports in the analysis_cache table for one prompt/model version.
+
+    partition() splits a backlog into cached reports and the uids that still need a call, keeping only one
+    article per distinct text; store() records a fresh report and returns every uid that shares its text, discard()
+    does the same for a text that will not be analyzed.
+    """
+
+    def __init__(self, db_connection, prompt: str, model: str):
+        self._db = db_connection
+        self._version = hashlib.sha256(f"{model}\0{prompt}".encode("utf-8")).hexdigest()
+        self._uids_by_key: dict[str, list[int]] = {}
+        self._key_by_uid: dict[int, str] = {}
+        self._new: list[tuple[str, dict]] = []
+
+    def key(self, content: str | None) -> str | None:
+        """Cache key of an article text, or None for empty text (never cached)."""
+        text = normalize_text(content or "")
+        if not text:
+            return None
+        return hashlib.sha256(f"{self._version}\0{text}".encode("utf-8")).hexdigest()
+
+    def partition(self, articles: Iterable[tuple[int, str | None]]) -> tuple[list[tuple[int, dict]], list[int]]:
+        """Return (cached (uid, report) pairs, uids to analyze with one representative per text).
+
+        Only the hash of each text is kept, so articles can be streamed from the database.
+        """
+        to_analyze = []
+        by_key = defaultdict(list)
+        for uid, content in articles:
+            key = self.key(content)
+            if key is None:
+                to_analyze.append(uid)
+            else:
+                by_key[key].append(uid)
+        cached = get_cached_analyses(self._db, list(by_key))
+        hits = []
+        for key, group in by_key.items():
+            if key in cached:
+                hits.extend((uid, cached[key]) for uid in group)
+                continue
+            to_analyze.append(group[0])
+            self._uids_by_key[key] = group
+            self._key_by_uid[group[0]] = key
+        return hits, to_analyze
+
+    def store(self, uid: int, report: dict) -> list[int]:
+        """Remember report for uid's text (written by flush) and return all backlog uids with that text."""
+        key = self._key_by_uid.pop(uid, None)
+        if key is None:
+            return [uid]
+        self._new.append((key, report))
+        return self._uids_by_key.pop(key)
+
+    def discard(self, uid: int) -> list[int]:
+        """Forget uid's text (it will not be analyzed) and return all backlog uids with that text."""
+        key = self._key_by_uid.pop(uid, None)
+        if key is None:
+            return [uid]
+        return self._uids_by_key.pop(key)
+
+    def flush(self) -> None:
+        save_cached_analyses(self._db, self._new)
+        self._new.clear()
@@ -1,15 +1,36 @@
 import html as html_module
 import re
 from datetime import datetime, timedelta
+from typing import Iterable, Iterator
 
-import pandas as pd
 import requests
 
-from config.config import API_EXTRACTION_LAG_MINUTES, API_EXTRACTION_WINDOW, GUARDIAN_API_KEY
-from database import close_db, connect_to_db, run_query
+from config.config import (
+    API_EXTRACTION_LAG_MINUTES,
+    API_EXTRACTION_WINDOW,
+    API_REQUEST_TIMEOUT,
+    GUARDIAN_API_CONCURRENCY,
+    GUARDIAN_API_KEY,
+    GUARDIAN_API_RPM,
+)
+from database import close_db, connect_to_db, insert_articles
+from pipeline.scripts.http_client import (
+    ApiRequestError,
+    RequestBudget,
+    get_session,
+    paginate_concurrently,
+)
+from pipeline.scripts.pipeline_dataclasses import ArticleRecord, unique_records
+from pipeline.scripts.window_planner import ExtractionWindow, WindowSpec, run_incremental_sweep
 
+SOURCE = "guardian"
 BASE_URL = "https://content.guardianapis.com/search"
 
+# from-date/to-date are whole days; pagination is unbounded, so a window never needs splitting.
+WINDOW_SPEC = WindowSpec(resolution=timedelta(days=1))
+
+_budget = RequestBudget(GUARDIAN_API_CONCURRENCY, GUARDIAN_API_RPM)
+
 
 def _html_to_plain(html: str) -> str:
     """Return plain text from HTML; empty string if missing/invalid."""
@@ -19,8 +40,22 @@ def _html_to_plain(html: str) -> str:
     return html_module.unescape(text).strip()
 
 
-def get_guardian_articles(topic: str, from_date, to_date) -> list | None:
-    """Fetch all pages of Guardian search. Returns list of result dicts or None on failure."""
+def _get_guardian_page(params: dict, page: int) -> dict:
+    """Fetch one page of Guardian search and return its "response" object. Raises ApiRequestError on failure."""
+    with _budget:
+        resp = get_session().get(
+            BASE_URL, params={**params, "page": page}, timeout=API_REQUEST_TIMEOUT
+        )
+    if resp.status_code != 200:
+        raise ApiRequestError(f"Guardian API failed {resp.status_code}")
+    r = resp.json().get("response", {})
+    if r.get("status") != "ok":
+        raise ApiRequestError(f"Guardian API returned status {r.get('status')}")
+    return r
+
+
+def iter_guardian_pages(topic: str, from_date, to_date) -> Iterator[dict]:
+    """Yield Guardian search pages ("response" objects) as they arrive. Page 1 reports the page count; pages 2..N are then fetched concurrently."""
     params = {
         "q": topic,
         "from-date": from_date.strftime("%Y-%m-%d"),
@@ -30,73 +65,63 @@ def get_guardian_articles(topic: str, from_date, to_date) -> list | None:
         "page-size": 50,
         "api-key": GUARDIAN_API_KEY,
     }
-    results = []
-    page = 1
-    while True:
-        params["page"] = page
-        resp = requests.get(BASE_URL, params=params)
-        if resp.status_code != 200:
-            print(f"Guardian API failed {resp.status_code}")
-            return None
-        data = resp.json()
-        r = data.get("response", {})
-        if r.get("status") != "ok":
-            return None
-        results.extend(r.get("results", []))
-        if page >= r.get("pages", 1):
-            break
-        page += 1
-    return results
-
-
-def transform_guardian_articles(raw: list | None) -> pd.DataFrame:
-    """Build DataFrame with columns matching DB: title, content, link, published_date."""
-    if not raw:
-        return pd.DataFrame()
-    rows = []
-    for r in raw:
+    first = _get_guardian_page(params, 1)
+    yield first
+    yield from paginate_concurrently(
+        lambda page: _get_guardian_page(params, page),
+        2,
+        first.get("pages", 1) + 1,
+        GUARDIAN_API_CONCURRENCY,
+    )
+
+
+def transform_guardian_articles(raw: list | None) -> Iterator[ArticleRecord]:
+    """Yield an ArticleRecord per result in one page of results (title, plain-text body, url, published date)."""
+    for r in raw or []:
         title, url = r.get("webTitle"), r.get("webUrl")
         if not title or not url:
             continue
         fields = r.get("fields") or {}
         body_html = fields.get("body", "") or ""
-        rows.append(
-            {
-                "title": title,
-                "content": _html_to_plain(body_html),
-                "url": url,
-                "published_date": r.get("webPublicationDate", ""),
-            }
-        )
-    df = pd.DataFrame(rows).drop_duplicates(subset="url")
-    return df
-
-
-def save_guardian_articles(conn, df: pd.DataFrame) -> None:
-    """Insert Guardian rows into newsolvr. Caller manages connection."""
-    for row in df.itertuples(index=False):
-        run_query(
-            conn,
-            """INSERT INTO newsolvr
-            (title_article, content_article, link_article, published_date)
-            VALUES (?, ?, ?, ?)
-            ON CONFLICT (link_article) DO NOTHING""",
-            (row.title, row.content, row.url, row.published_date),
-        )
+        yield ArticleRecord(title, _html_to_plain(body_html), url, r.get("webPublicationDate", ""))
+
+
+def save_guardian_articles(conn, records: Iterable[ArticleRecord]) -> tuple[int, int]:
+    """Bulk-insert Guardian records into newsolvr in one transaction; returns (inserted, ignored). Caller manages connection."""
+    return insert_articles(conn, (record.as_row() for record in records))
+
+
+def ingest_guardian_window(conn, topic: str, window: ExtractionWindow, seen: set) -> int | None:
+    """Stream every page of one window into the database as it arrives, skipping urls already in seen. Returns the window's hit count, or None on failure."""
+    total = 0
+    try:
+        for page in iter_guardian_pages(topic, window.start, window.last_instant):
+            total = page.get("total", total)
+            records = transform_guardian_articles(page.get("results", []))
+            save_guardian_articles(conn, unique_records(records, seen))
+    except (ApiRequestError, requests.RequestException) as e:
+        print(e)
+        return None
+    return total
 
 
 def guardian_api_extraction_pipeline(search_topic: str, iterations: int = 24):
-    """Fetch Guardian articles and persist to database. Reuses API_EXTRACTION_WINDOW and LAG from config. iterations defaults to 24 for full-day coverage."""
+    """Fetch Guardian articles and persist to database. Reuses API_EXTRACTION_WINDOW and LAG from config; iterations * window is the span covered (default 24 hours); only the part after the stored watermark is fetched, queried once per calendar day rather than once per window."""
     conn = connect_to_db()
     window_delta = timedelta(minutes=API_EXTRACTION_WINDOW)
     lag_delta = timedelta(minutes=API_EXTRACTION_LAG_MINUTES)
     to_date = datetime.now() - lag_delta
-    from_date = to_date - window_delta
-    for _ in range(iterations):
-        raw = get_guardian_articles(search_topic, from_date, to_date)
-        df = transform_guardian_articles(raw)
-        save_guardian_articles(conn, df)
-        from_date -= window_delta
-        to_date -= window_delta
+    from_date = to_date - iterations * window_delta
+    seen_urls = set()
+    run_incremental_sweep(
+        conn,
+        SOURCE,
+        search_topic,
+        from_date,
+        to_date,
+        WINDOW_SPEC,
+        lambda w, _cap: ingest_guardian_window(conn, search_topic, w, seen_urls),
+        GUARDIAN_API_CONCURRENCY,
+    )
     print("Pipeline complete: extract Guardian articles from api.")
     close_db(conn)
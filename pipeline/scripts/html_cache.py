@@ -0,0 +1,128 @@
+"""On-disk cache for scraped article HTML: keyed by normalized URL, gzip-compressed, revalidated with ETag/Last-Modified and LRU-evicted by size."""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from config.config import HTML_CACHE_DIR, HTML_CACHE_MAX_MB, HTML_CACHE_TTL_HOURS
+
+_DEFAULT_PORTS = {"http": "80", "https": "443"}
+_TRACKING_PREFIXES = ("utm_", "fbclid", "gclid", "cmpid", "ocid")
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form for cache keys: lowercase scheme/host, no default port, fragment or tracking params, sorted query."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and str(parts.port) != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith(_TRACKING_PREFIXES)
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+@dataclass
+class CachedPage:
+    body: str
+    etag: str | None
+    last_modified: str | None
+    fetched_at: float
+
+
+class HtmlCache:
+    """Content-addressed files (<sha256 of normalized URL>.gz holding a JSON header line plus the body) under directory."""
+
+    def __init__(self, directory: Path, max_bytes: int, ttl_seconds: float):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._size: int | None = None
+
+    def _path(self, url: str) -> Path:
+        key = hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+        return self.directory / key[:2] / f"{key}.gz"
+
+    def get(self, url: str) -> CachedPage | None:
+        """Return the cached page (fresh or stale) and mark it recently used; None on miss or unreadable entry."""
+        path = self._path(url)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                header = json.loads(f.readline())
+                body = f.read()
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return CachedPage(body, header.get("etag"), header.get("last_modified"), header["fetched_at"])
+
+    def is_fresh(self, page: CachedPage) -> bool:
+        return time.time() - page.fetched_at < self.ttl_seconds
+
+    def put(self, url: str, body: str, etag: str | None, last_modified: str | None) -> None:
+        """Store a page atomically (write temp file, then rename) and evict least recently used entries over max_bytes."""
+        path = self._path(url)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        header = {"url": url, "etag": etag, "last_modified": last_modified, "fetched_at": time.time()}
+        data = gzip.compress((json.dumps(header) + "\n" + body).encode("utf-8"))
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        with self._lock:
+            size = self._current_size()
+            old_size = path.stat().st_size if path.exists() else 0
+            os.replace(tmp, path)
+            self._size = size + len(data) - old_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def refresh(self, url: str, page: CachedPage) -> None:
+        """Restart the TTL of a page the origin confirmed unchanged (304)."""
+        self.put(url, page.body, page.etag, page.last_modified)
+
+    def _current_size(self) -> int:
+        if self._size is None:
+            self._size = sum(p.stat().st_size for p in self.directory.glob("*/*.gz"))
+        return self._size
+
+    def _evict(self) -> None:
+        """Delete least recently used entries (oldest mtime) until the cache is at 90% of max_bytes."""
+        entries = []
+        for path in self.directory.glob("*/*.gz"):
+            stat = path.stat()
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        target = int(self.max_bytes * 0.9)
+        for _mtime, size, path in entries:
+            if self._size <= target:
+                break
+            try:
+                path.unlink()
+                self._size -= size
+            except OSError:
+                pass
+
+
+_cache: HtmlCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_html_cache() -> HtmlCache | None:
+    """Return the process-wide cache, or None if HTML_CACHE_DIR is empty (caching disabled)."""
+    global _cache
+    if not HTML_CACHE_DIR:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = HtmlCache(
+                Path(HTML_CACHE_DIR), HTML_CACHE_MAX_MB * 1024 * 1024, HTML_CACHE_TTL_HOURS * 3600
+            )
+        return _cache
@@ -0,0 +1,84 @@
+"""Shared HTTP plumbing for the extractors: one pooled session, per-API request budgets and concurrent pagination."""
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterator
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config.config import HTTP_POOL_MAXSIZE
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+
+class ApiRequestError(Exception):
+    """A search API answered with a non-200 status or a non-ok payload."""
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide requests.Session (keep-alive, pooled per host). Thread-safe."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=32, pool_maxsize=HTTP_POOL_MAXSIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+class RequestBudget:
+    """Caps in-flight requests to one API and, if requests_per_minute is set, spaces request starts evenly. Use as a context manager around each call."""
+
+    def __init__(self, max_concurrent: int, requests_per_minute: float = 0):
+        self._semaphore = threading.BoundedSemaphore(max(1, max_concurrent))
+        self._interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self._next_slot = 0.0
+        self._rate_lock = threading.Lock()
+
+    def __enter__(self):
+        self._semaphore.acquire()
+        if self._interval:
+            with self._rate_lock:
+                now = time.monotonic()
+                slot = max(now, self._next_slot)
+                self._next_slot = slot + self._interval
+            if slot > now:
+                time.sleep(slot - now)
+        return self
+
+    def __exit__(self, *exc_info):
+        self._semaphore.release()
+        return False
+
+
+def paginate_concurrently(
+    fetch_page: Callable[[int], object],
+    first_page: int,
+    stop_page: int,
+    max_in_flight: int,
+    is_last: Callable[[object], bool] | None = None,
+) -> Iterator[object]:
+    """Fetch pages first_page..stop_page-1 with up to max_in_flight requests outstanding; yield results as they arrive.
+
+    When the page count is unknown, pass a generous stop_page and is_last: pages are then prefetched speculatively
+    and no page after one for which is_last(result) is true gets scheduled.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, max_in_flight)) as executor:
+        pending = {}
+        next_page = first_page
+        while pending or next_page < stop_page:
+            while next_page < stop_page and len(pending) < max_in_flight:
+                pending[executor.submit(fetch_page, next_page)] = next_page
+                next_page += 1
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                page = pending.pop(future)
+                result = future.result()
+                if is_last is not None and is_last(result):
+                    stop_page = min(stop_page, page + 1)
+                yield result
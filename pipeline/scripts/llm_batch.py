@@ -0,0 +1,148 @@
+"""Batch-mode problem analysis: pack the unanalyzed backlog into batch prediction jobs instead of one call per article."""
+
+import itertools
+import json
+import time
+from typing import Callable, Iterable, Iterator, Protocol
+
+from google import genai
+from google.genai import types
+
+from config.config import GEMINI_API_KEY, LLM_BATCH_MAX_ARTICLES, LLM_BATCH_POLL_SECONDS, LLM_MODEL
+from pipeline.scripts.llm_functions import fetch_prompt
+from pipeline.scripts.pipeline_dataclasses import ProblemReport
+
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+_GEMINI_STATES = {
+    "JOB_STATE_SUCCEEDED": SUCCEEDED,
+    "JOB_STATE_PARTIALLY_SUCCEEDED": SUCCEEDED,
+    "JOB_STATE_FAILED": FAILED,
+    "JOB_STATE_CANCELLED": FAILED,
+    "JOB_STATE_EXPIRED": FAILED,
+}
+
+
+class BatchBackend(Protocol):
+    """Batch prediction service: submit keyed articles, poll the job, then read back keyed reports."""
+
+    def submit(self, requests: list[tuple[str, str]]) -> str:
+        """Start a job for (key, article) pairs and return its name."""
+
+    def poll(self, job_name: str) -> str:
+        """Return RUNNING, SUCCEEDED or FAILED."""
+
+    def results(self, job_name: str) -> Iterator[tuple[str, dict | None]]:
+        """Yield (key, report or None if that request failed) for a SUCCEEDED job."""
+
+
+class GeminiBatchBackend:
+    """Gemini Batch API with inlined requests; each request carries its key in metadata."""
+
+    def __init__(self, model: str = LLM_MODEL, client=None):
+        self.model = model
+        self.prompt = fetch_prompt()
+        self._client = client or genai.Client(api_key=GEMINI_API_KEY)
+
+    def submit(self, requests: list[tuple[str, str]]) -> str:
+        config = types.GenerateContentConfig(
+            system_instruction=self.prompt,
+            max_output_tokens=1500,
+            response_mime_type="application/json",
+            response_schema=ProblemReport,
+        )
+        job = self._client.batches.create(
+            model=self.model,
+            src=[
+                types.InlinedRequest(
+                    contents=article,
+                    config=config,
+                    metadata={"key": key},
+                )
+                for key, article in requests
+            ],
+            config=types.CreateBatchJobConfig(display_name=f"newsolvr-analysis-{int(time.time())}"),
+        )
+        return job.name
+
+    def poll(self, job_name: str) -> str:
+        job = self._client.batches.get(name=job_name)
+        state = job.state.name if job.state else ""
+        return _GEMINI_STATES.get(state, RUNNING)
+
+    def results(self, job_name: str) -> Iterator[tuple[str, dict | None]]:
+        job = self._client.batches.get(name=job_name)
+        for item in (job.dest.inlined_responses if job.dest else None) or []:
+            key = (item.metadata or {}).get("key")
+            if key is None:
+                continue
+            if item.error or item.response is None or not item.response.text:
+                yield key, None
+                continue
+            try:
+                yield key, json.loads(item.response.text)
+            except ValueError:
+                yield key, None
+
+
+class FakeBatchBackend:
+    """In-process stand-in for a batch service: jobs report RUNNING for polls_until_done polls, then run analyze on every request."""
+
+    def __init__(self, analyze: Callable[[str], dict], polls_until_done: int = 1):
+        self._analyze = analyze
+        self._polls_until_done = polls_until_done
+        self._jobs: dict[str, tuple[list[tuple[str, str]], list[int]]] = {}
+
+    def submit(self, requests: list[tuple[str, str]]) -> str:
+        name = f"batches/fake-{len(self._jobs) + 1}"
+        self._jobs[name] = (list(requests), [0])
+        return name
+
+    def poll(self, job_name: str) -> str:
+        _requests, polls = self._jobs[job_name]
+        polls[0] += 1
+        return SUCCEEDED if polls[0] > self._polls_until_done else RUNNING
+
+    def results(self, job_name: str) -> Iterator[tuple[str, dict | None]]:
+        requests, _polls = self._jobs[job_name]
+        for key, article in requests:
+            try:
+                yield key, self._analyze(article)
+            except Exception:
+                yield key, None
+
+
+def analyze_articles_in_batches(
+    articles: Iterable[tuple[int, str]],
+    backend: BatchBackend,
+    max_articles_per_job: int = LLM_BATCH_MAX_ARTICLES,
+    poll_seconds: float = LLM_BATCH_POLL_SECONDS,
+) -> Iterator[tuple[int, dict]]:
+    """Submit (uid, content) pairs as jobs of up to max_articles_per_job articles, wait for them, and yield (uid, report).
+
+    All jobs are submitted up front so the service can work on them in parallel; results are yielded job by job as
+    they complete. Articles whose request or job failed are left out and stay unanalyzed for the next run.
+    """
+    jobs = []
+    articles = iter(articles)
+    while chunk := list(itertools.islice(articles, max(1, max_articles_per_job))):
+        job_name = backend.submit([(str(uid), content) for uid, content in chunk])
+        print(f"Submitted batch job {job_name} with {len(chunk)} articles")
+        jobs.append(job_name)
+
+    while jobs:
+        for job_name in list(jobs):
+            state = backend.poll(job_name)
+            if state == RUNNING:
+                continue
+            jobs.remove(job_name)
+            if state == FAILED:
+                print(f"Batch job {job_name} failed")
+                continue
+            for key, report in backend.results(job_name):
+                if report is not None:
+                    yield int(key), report
+        if jobs:
+            time.sleep(poll_seconds)
@@ -1,11 +1,23 @@
 import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache
 from pathlib import Path
+from typing import Callable, Iterable, Iterator
 
 from google import genai
-from google.genai import types
+from google.genai import errors, types
 
-from config.config import GEMINI_API_KEY
+from config.config import (
+    GEMINI_API_KEY,
+    LLM_MAX_CONCURRENCY,
+    LLM_MAX_RETRIES,
+    LLM_MODEL,
+    LLM_PROMPT_CACHE_TTL_MINUTES,
+)
 from pipeline.scripts.pipeline_dataclasses import ProblemReport
+from pipeline.scripts.rate_limiter import LlmRateLimiter
 
 
 def fetch_prompt():
@@ -13,17 +25,193 @@ def fetch_prompt():
     return path.read_text(encoding="utf-8")
 
 
+class ProblemAnalyzer:
+    """Long-lived Gemini analyzer: one client (pooled connections), the prompt read once, and the constant
+    system instruction stored server-side in an explicit context cache so requests only send the article.
+
+    The response schema is part of the generation config, which context caches cannot hold, so it is still
+    sent per request. If a cache cannot be created (e.g. the prompt is below the model's minimum cacheable
+    size) the prompt is sent inline instead. Use as a context manager so the cache is deleted afterwards.
+    """
+
+    def __init__(self, model: str = LLM_MODEL, cache_ttl_minutes: int = LLM_PROMPT_CACHE_TTL_MINUTES, client=None):
+        self.model = model
+        self.prompt = fetch_prompt()
+        self._client = client or genai.Client(api_key=GEMINI_API_KEY)
+        self._cache_ttl = cache_ttl_minutes * 60
+        self._cache_name: str | None = None
+        self._cache_expires = 0.0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def _cached_content(self) -> str | None:
+        """Name of a live cache holding the system prompt, (re)created shortly before it expires; None if caching is off."""
+        with self._lock:
+            if self._cache_ttl <= 0:
+                return None
+            if self._cache_name and time.monotonic() < self._cache_expires - 60:
+                return self._cache_name
+            try:
+                cache = self._client.caches.create(
+                    model=self.model,
+                    config=types.CreateCachedContentConfig(
+                        system_instruction=self.prompt,
+                        ttl=f"{self._cache_ttl}s",
+                        display_name="newsolvr-problem-analyzer",
+                    ),
+                )
+            except errors.APIError as exc:
+                print(f"Context caching unavailable, sending the prompt inline: {exc}")
+                self._cache_ttl = 0
+                return None
+            self._cache_name = cache.name
+            self._cache_expires = time.monotonic() + self._cache_ttl
+            return self._cache_name
+
+    def analyze(self, article: str, _retry_cache: bool = True) -> tuple[dict, int | None]:
+        """Returns (report, total tokens billed or None). The report holds problem_summary, problem_statement, and 14 score keys (int 0–5)."""
+        cache_name = self._cached_content()
+        prompt = {"cached_content": cache_name} if cache_name else {"system_instruction": self.prompt}
+        try:
+            response = self._client.models.generate_content(
+                model=self.model,
+                config=types.GenerateContentConfig(
+                    max_output_tokens=1500,
+                    response_mime_type="application/json",
+                    response_schema=ProblemReport,
+                    **prompt,
+                ),
+                contents=article,
+            )
+        except errors.ClientError as exc:
+            if not cache_name or not _retry_cache or exc.code not in (403, 404):
+                raise
+            # The cache vanished server-side (expired early or deleted): make a new one and retry once.
+            with self._lock:
+                self._cache_name = None
+            return self.analyze(article, _retry_cache=False)
+        usage = response.usage_metadata
+        return json.loads(response.text), usage.total_token_count if usage else None
+
+    def close(self) -> None:
+        """Delete the context cache (it bills storage until its TTL runs out) and close the client."""
+        with self._lock:
+            if self._cache_name:
+                try:
+                    self._client.caches.delete(name=self._cache_name)
+                except errors.APIError:
+                    pass
+                self._cache_name = None
+        self._client.close()
+
+
 def analyze_article(article: str) -> dict:
-    """Returns dict with problem_summary, problem_statement, and 14 score keys (int 0–5)."""
-    client = genai.Client(api_key=GEMINI_API_KEY)
-    response = client.models.generate_content(
-        model="gemini-2.5-flash-lite",
-        config=types.GenerateContentConfig(
-            system_instruction=fetch_prompt(),
-            max_output_tokens=1500,
-            response_mime_type="application/json",
-            response_schema=ProblemReport,
-        ),
-        contents=article,
-    )
-    return json.loads(response.text)
+    """Returns dict with problem_summary, problem_statement, and 14 score keys (int 0–5). One-off use; pipelines keep a ProblemAnalyzer."""
+    with ProblemAnalyzer(cache_ttl_minutes=0) as analyzer:
+        return analyzer.analyze(article)[0]
+
+
+@lru_cache(maxsize=1)
+def _prompt_tokens() -> int:
+    return len(fetch_prompt()) // 4
+
+
+def estimate_tokens(article: str) -> int:
+    """Rough input token count of one analysis request (~4 characters per token), for the TPM budget."""
+    return _prompt_tokens() + len(article or "") // 4 + 1
+
+
+def retry_after_seconds(exc: Exception) -> float | None:
+    """Seconds Gemini asks us to wait after a 429 (Retry-After header or RetryInfo detail; 0.0 if it gives none). None if exc is not a 429."""
+    if not isinstance(exc, errors.APIError) or exc.code != 429:
+        return None
+    headers = getattr(exc.response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        pass
+    error = exc.details.get("error", {}) if isinstance(exc.details, dict) else {}
+    for detail in error.get("details") or []:
+        if str(detail.get("@type", "")).endswith("RetryInfo"):
+            try:
+                return float(str(detail.get("retryDelay", "")).rstrip("s"))
+            except ValueError:
+                pass
+    return 0.0
+
+
+def analyze_articles_concurrently(
+    articles: Iterable[tuple[int, str]],
+    limiter: LlmRateLimiter,
+    analyze: Callable[[str], tuple[dict, int | None]],
+    max_workers: int = LLM_MAX_CONCURRENCY,
+) -> Iterator[tuple[int, dict]]:
+    """Analyze (uid, content) pairs with up to max_workers calls in flight and yield (uid, report) as they finish.
+
+    analyze(content) returns (report, tokens used or None), e.g. ProblemAnalyzer.analyze; the reported usage
+    replaces the up-front token estimate in the limiter.
+
+    Every call first takes a slot from limiter (RPM, TPM, persisted RPD); once the daily quota is spent no new
+    articles are started. A 429 pauses all workers for the server's retry delay (exponential backoff if it gives
+    none), its daily slot is refunded, and the article is retried up to LLM_MAX_RETRIES times. Other errors stop
+    new calls and propagate once the reports of the calls already in flight have been yielded.
+    """
+    quota_spent = False
+
+    def work(content: str) -> dict | None:
+        nonlocal quota_spent
+        tokens = estimate_tokens(content)
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            if quota_spent or not limiter.acquire(tokens):
+                quota_spent = True
+                return None
+            try:
+                report, used_tokens = analyze(content)
+            except Exception as exc:
+                delay = retry_after_seconds(exc)
+                if delay is None:
+                    raise
+                # Rate-limited requests are not billed; only the accepted attempt counts against RPD.
+                limiter.refund(tokens)
+                if attempt == LLM_MAX_RETRIES:
+                    raise
+                limiter.pause(delay or 2**attempt)
+                continue
+            if used_tokens is not None:
+                limiter.record_tokens(tokens, used_tokens)
+            return report
+        return None
+
+    error = None
+    articles = iter(articles)
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        pending = {}
+        while True:
+            while error is None and not quota_spent and len(pending) < max_workers:
+                item = next(articles, None)
+                if item is None:
+                    break
+                uid, content = item
+                pending[executor.submit(work, content)] = uid
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                uid = pending.pop(future)
+                try:
+                    report = future.result()
+                except Exception as exc:
+                    # Start nothing new, but still collect the calls in flight: they are billed.
+                    if error is None:
+                        error = exc
+                    continue
+                if report is not None:
+                    yield uid, report
+    if error is not None:
+        raise error
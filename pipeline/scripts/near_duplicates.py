@@ -0,0 +1,159 @@
+"""Near-duplicate index: 64-bit SimHash over article word shingles, looked up through permuted-block keys of 18+ bits
+(Manku et al., "Detecting Near-Duplicates for Web Crawling")."""
+
+import hashlib
+import re
+from itertools import combinations
+
+from database import get_query, iter_article_bodies, run_many
+
+# Calibrated on truncated, syndicated (boilerplate added) and lightly edited copies of 500-word texts: 2-word
+# shingles within 7 bits catch 96% of 5%-truncated, 83% of 10%-truncated, 99% of syndicated and 96% of
+# sentence-edited copies, with 1 false match in ~9,000 unrelated pairs.
+MAX_DISTANCE = 7  # bits
+# The 64 bits are cut into 10 blocks; 7 differing bits leave at least 3 blocks untouched, so any pair within
+# MAX_DISTANCE shares the key built from those 3 blocks. One key per 3-block combination: 120 keys of 18-21 bits,
+# so an unrelated row comes up as a candidate in about 1 of 4,400 lookups.
+BLOCK_WIDTHS = (7, 7, 7, 7, 6, 6, 6, 6, 6, 6)
+BLOCKS_PER_KEY = len(BLOCK_WIDTHS) - MAX_DISTANCE
+SHINGLE_SIZE = 2
+TITLE_MATCH_WINDOW = 3 * 86400  # seconds between publications for an identical title to count as a copy
+MIN_BODY_WORDS = 20  # shorter bodies (API snippets) are fingerprinted together with the title
+_WORD = re.compile(r"\w+")
+_SIGN_BIT = 1 << 63
+_BLOCKS = [(sum(BLOCK_WIDTHS[:i]), width) for i, width in enumerate(BLOCK_WIDTHS)]  # (shift, width)
+_KEY_BLOCKS = list(combinations(_BLOCKS, BLOCKS_PER_KEY))
+
+
+def simhash(text: str, shingle_size: int = SHINGLE_SIZE) -> int:
+    """Unsigned 64-bit SimHash of the text's lowercase word shingles."""
+    words = _WORD.findall(text.lower())
+    shingles = [" ".join(words[i : i + shingle_size]) for i in range(max(1, len(words) - shingle_size + 1))]
+    hashes = [
+        f"{int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big'):064b}"
+        for shingle in shingles
+    ]
+    # Majority vote per bit position (column of the binary strings, most significant first).
+    half = len(hashes) / 2
+    bits = "".join("1" if column.count("1") > half else "0" for column in zip(*hashes))
+    return int(bits, 2)
+
+
+def to_signed(value: int) -> int:
+    """SQLite INTEGER is signed 64-bit."""
+    return value - (1 << 64) if value & _SIGN_BIT else value
+
+
+def bands(value: int) -> list[tuple[int, int]]:
+    """(band, key) per block combination: the key concatenates the bits of that combination's blocks."""
+    keys = []
+    for band, blocks in enumerate(_KEY_BLOCKS):
+        key = 0
+        for shift, width in blocks:
+            key = key << width | value >> shift & ((1 << width) - 1)
+        keys.append((band, key))
+    return keys
+
+
+def hamming(a: int, b: int) -> int:
+    return ((a ^ b) & 0xFFFFFFFFFFFFFFFF).bit_count()
+
+
+def fingerprint(title: str | None, content: str | None) -> int:
+    """SimHash of the body, so rewritten headlines over the same story still match; title + body for short snippets."""
+    if len(_WORD.findall(content or "")) >= MIN_BODY_WORDS:
+        return simhash(content)
+    return simhash(f"{title or ''} {content or ''}")
+
+
+def _indexed_candidates(
+    db_connection, value: int, title: str | None, published_at: int | None
+) -> list[tuple[int, int, str | None, int | None]]:
+    """(uid, simhash, title, published_at) of indexed rows sharing a band with value, or having the same title and
+    a publication time within TITLE_MATCH_WINDOW (or unknown); the title lookup is a range on
+    idx_newsolvr_title_published."""
+    band_filter = " OR ".join("(b.band = ? AND b.value = ?)" for _ in _KEY_BLOCKS)
+    params = [param for pair in bands(value) for param in pair]
+    if published_at is None:
+        title_filters, title_params = ["title_article = ?"], [title]
+    else:
+        # Two branches rather than an OR, so each is an index range.
+        title_filters = [
+            "title_article = ? AND published_at BETWEEN ? AND ?",
+            "title_article = ? AND published_at IS NULL",
+        ]
+        title_params = [title, published_at - TITLE_MATCH_WINDOW, published_at + TITLE_MATCH_WINDOW, title]
+    title_selects = "".join(
+        f"""
+        UNION
+        SELECT uid, simhash, title_article, published_at FROM newsolvr WHERE {title_filter} AND simhash IS NOT NULL"""
+        for title_filter in title_filters
+    )
+    return get_query(
+        db_connection,
+        f"""SELECT n.uid, n.simhash, n.title_article, n.published_at FROM simhash_bands b
+        JOIN newsolvr n ON n.uid = b.uid WHERE {band_filter}{title_selects}""",
+        (*params, *title_params),
+    )
+
+
+def _is_duplicate(value: int, title: str | None, published_at: int | None, candidate) -> bool:
+    _uid, other_value, other_title, other_published_at = candidate
+    if other_value is not None and hamming(value, other_value) <= MAX_DISTANCE:
+        return True
+    if title and title == other_title:
+        if published_at is None or other_published_at is None:
+            return True
+        return abs(published_at - other_published_at) <= TITLE_MATCH_WINDOW
+    return False
+
+
+def index_new_articles(db_connection) -> list[tuple[int, int]]:
+    """Fingerprint articles not yet indexed and return (duplicate uid, canonical uid) pairs.
+
+    New articles are taken in published order, so within a cluster the earliest (or an already indexed) article
+    stays canonical. Each lookup is a fixed set of indexed key probes whose keys are long enough that unrelated rows
+    rarely match (see BLOCK_WIDTHS), so few candidates need a Hamming check as the table grows. Canonical
+    articles are added to the index; duplicates are not, and are left for the caller to drop. Analyzed articles
+    are only unindexed after a fingerprint change (see migrations); they are re-indexed but never dropped.
+    """
+    rows = get_query(
+        db_connection,
+        """SELECT uid, title_article, published_at, problem_statement IS NOT NULL FROM newsolvr
+        WHERE simhash IS NULL ORDER BY published_at, uid""",
+    )
+    bodies = iter_article_bodies(db_connection, [row[0] for row in rows])
+    batch_bands: dict[tuple[int, int], list] = {}
+    batch_titles: dict[str, list] = {}
+    indexed, duplicates = [], []
+    for (uid, title, published_at, analyzed), (_uid, content) in zip(rows, bodies):
+        value = fingerprint(title, content)
+        candidates = [
+            (c_uid, c_value & 0xFFFFFFFFFFFFFFFF, c_title, c_date)
+            for c_uid, c_value, c_title, c_date in _indexed_candidates(db_connection, to_signed(value), title, published_at)
+        ]
+        for band in bands(value):
+            candidates.extend(batch_bands.get(band, ()))
+        candidates.extend(batch_titles.get(title, ()))
+        canonical = next((c[0] for c in candidates if _is_duplicate(value, title, published_at, c)), None)
+        if canonical is not None and not analyzed:
+            duplicates.append((uid, canonical))
+            continue
+        candidate = (uid, value, title, published_at)
+        for band in bands(value):
+            batch_bands.setdefault(band, []).append(candidate)
+        if title:
+            batch_titles.setdefault(title, []).append(candidate)
+        indexed.append((uid, value))
+
+    run_many(
+        db_connection,
+        "UPDATE newsolvr SET simhash = ? WHERE uid = ?",
+        ((to_signed(value), uid) for uid, value in indexed),
+    )
+    run_many(
+        db_connection,
+        "INSERT OR IGNORE INTO simhash_bands (band, value, uid) VALUES (?, ?, ?)",
+        ((band, band_value, uid) for uid, value in indexed for band, band_value in bands(value)),
+    )
+    return duplicates
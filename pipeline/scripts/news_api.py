@@ -1,17 +1,32 @@
 from datetime import datetime, timedelta
+from typing import Iterable, Iterator
 
-import pandas as pd
 import requests
 import trafilatura
 
 from config.config import (
     API_EXTRACTION_LAG_MINUTES,
     API_EXTRACTION_WINDOW,
+    API_REQUEST_TIMEOUT,
     FETCH_HTML_HEADERS,
     FETCH_HTML_TIMEOUT,
+    NEWS_API_CONCURRENCY,
     NEWS_API_KEY,
+    NEWS_API_MAX_REQUESTS_PER_RUN,
+    NEWS_API_RPM,
 )
-from database import close_db, connect_to_db, run_query
+from database import close_db, connect_to_db, insert_articles
+from pipeline.scripts.html_cache import get_html_cache
+from pipeline.scripts.http_client import RequestBudget, get_session
+from pipeline.scripts.pipeline_dataclasses import ArticleRecord, unique_records
+from pipeline.scripts.window_planner import ExtractionWindow, WindowSpec, run_incremental_sweep
+
+SOURCE = "news_api"
+
+# /v2/everything filters to the second, but one query returns at most 100 articles on our plan.
+WINDOW_SPEC = WindowSpec(resolution=timedelta(minutes=1), result_cap=100)
+
+_budget = RequestBudget(NEWS_API_CONCURRENCY, NEWS_API_RPM)
 
 
 def get_news_api_articles(topic, from_date, to_date):
@@ -19,72 +34,103 @@ def get_news_api_articles(topic, from_date, to_date):
     base_url = "https://newsapi.org/v2/everything"
     headers = {"X-API-Key": NEWS_API_KEY}
     params = {"q": topic, "language": "en", "from": from_date, "to": to_date}
-    response = requests.get(base_url, headers=headers, params=params)
+    with _budget:
+        response = get_session().get(
+            base_url, headers=headers, params=params, timeout=API_REQUEST_TIMEOUT
+        )
     if response.status_code == 200:
         return response.json()
     print(f"Failed to connect with API {response.status_code}")
     return None
 
 
-def transform_news_api_articles(raw_news_articles):
-    """Turn raw API response into a cleaned DataFrame. Pass None for empty df."""
+def transform_news_api_articles(raw_news_articles) -> Iterator[ArticleRecord]:
+    """Yield an ArticleRecord per raw API article that has a title and url. Pass None for no records."""
     if raw_news_articles is None:
-        return pd.DataFrame()
-    df = pd.json_normalize(raw_news_articles, "articles")
-    df = df[["title", "content", "publishedAt", "url"]]
-    df = df.dropna(subset=["title", "url"])
-    df["content"] = df["content"].fillna("")  # allow empty content; scraper can fill later
-    df = df.drop_duplicates(subset=["title"])
-    return df
-
-
-def save_news_api_articles(db_connection, df):
-    """Insert news API rows into newsolvr. Caller manages connection lifecycle."""
-    for row in df.itertuples(index=False):
-        run_query(
-            db_connection,
-            """INSERT INTO newsolvr
-            (title_article, content_article, link_article, published_date)
-            VALUES (?, ?, ?, ?)
-            ON CONFLICT (link_article) DO NOTHING""",
-            (row.title, row.content, row.url, row.publishedAt),
-        )
+        return
+    for article in raw_news_articles.get("articles") or []:
+        title, url = article.get("title"), article.get("url")
+        if not title or not url:
+            continue
+        # allow empty content; scraper can fill later
+        yield ArticleRecord(title, article.get("content") or "", url, article.get("publishedAt"))
+
+
+def save_news_api_articles(db_connection, records: Iterable[ArticleRecord]) -> tuple[int, int]:
+    """Bulk-insert news API records into newsolvr in one transaction; returns (inserted, ignored). Caller manages connection lifecycle."""
+    return insert_articles(db_connection, (record.as_row() for record in records))
+
+
+def ingest_news_api_window(
+    db_connection, topic: str, window: ExtractionWindow, seen: set, result_cap: int | None = None
+) -> int | None:
+    """Fetch and store one window, skipping titles already in seen. Returns totalResults, or None on failure. The fetched page is stored even if totalResults exceeds result_cap (the sweep then splits the window), so the request is not wasted."""
+    try:
+        raw_news_articles = get_news_api_articles(topic, window.start, window.end)
+    except requests.RequestException as e:
+        print(f"Failed to connect with API: {e}")
+        return None
+    if raw_news_articles is None:
+        return None
+    total = raw_news_articles.get("totalResults", 0)
+    records = transform_news_api_articles(raw_news_articles)
+    save_news_api_articles(db_connection, unique_records(records, seen, key="title"))
+    return total
 
 
 def news_api_extraction_pipeline(search_topic: str, iterations: int = 24):
-    """Fetch news articles from News API and persist to database. API_EXTRACTION_LAG_MINUTES is needed because the free api only allows news from 24 hours back; API_EXTRACTION_WINDOW is the time period over which articles are retrieved (default 60 minutes). iterations controls how many windows are run (default 24 for full-day coverage). Window and lag are read from config."""
+    """Fetch news articles from News API and persist to database. API_EXTRACTION_LAG_MINUTES is needed because the free api only allows news from 24 hours back; iterations * API_EXTRACTION_WINDOW is the span that is covered (default 24 hours). Only the part of the span after the stored watermark is fetched; it is queried as one window and only split where a query hits the 100-result cap, within NEWS_API_MAX_REQUESTS_PER_RUN requests (the rest is left behind the watermark for the next run). Window and lag are read from config."""
     conn = connect_to_db()
     window_delta = timedelta(minutes=API_EXTRACTION_WINDOW)
     lag_delta = timedelta(minutes=API_EXTRACTION_LAG_MINUTES)
 
     to_date = datetime.now() - lag_delta
-    from_date = to_date - window_delta
-
-    for _ in range(iterations):
-        raw_news_articles = get_news_api_articles(search_topic, from_date, to_date)
-        df_transformed_news_articles = transform_news_api_articles(raw_news_articles)
-        save_news_api_articles(conn, df_transformed_news_articles)
-
-        from_date -= window_delta
-        to_date -= window_delta
+    from_date = to_date - iterations * window_delta
+
+    seen_titles = set()
+    run_incremental_sweep(
+        conn,
+        SOURCE,
+        search_topic,
+        from_date,
+        to_date,
+        WINDOW_SPEC,
+        lambda w, cap: ingest_news_api_window(conn, search_topic, w, seen_titles, cap),
+        NEWS_API_CONCURRENCY,
+        NEWS_API_MAX_REQUESTS_PER_RUN or None,
+    )
 
     print("Pipeline complete: extract news articles from api.")
     close_db(conn)
 
 
 def fetch_article_html(url: str) -> str | None:
-    """Fetch HTML from url with timeout and a polite User-Agent. Returns None on failure."""
+    """Fetch HTML from url with timeout and a polite User-Agent. Returns None on failure. Served from the on-disk HTML cache while fresh; stale entries are revalidated with If-None-Match/If-Modified-Since."""
+    cache = get_html_cache()
+    cached = cache.get(url) if cache else None
+    if cached and cache.is_fresh(cached):
+        return cached.body
+    headers = dict(FETCH_HTML_HEADERS)
+    if cached and cached.etag:
+        headers["If-None-Match"] = cached.etag
+    if cached and cached.last_modified:
+        headers["If-Modified-Since"] = cached.last_modified
     try:
-        resp = requests.get(
+        resp = get_session().get(
             url,
-            headers=FETCH_HTML_HEADERS,
+            headers=headers,
             timeout=FETCH_HTML_TIMEOUT,
         )
+        if cached and resp.status_code == 304:
+            cache.refresh(url, cached)
+            return cached.body
         resp.raise_for_status()
-        return resp.text
     except requests.RequestException as e:
         print(f"Failed to fetch {url}: {e}")
         return None
+    if cache:
+        cache.put(url, resp.text, resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+    return resp.text
 
 
 def extract_article_text(html: str) -> str | None:
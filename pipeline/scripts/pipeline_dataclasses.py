@@ -1,7 +1,39 @@
-from typing import Literal
+from typing import Iterable, Iterator, Literal
 
 from pydantic import BaseModel, field_validator
 
+from utils.date_parsing import published_epoch
+
+
+class ArticleRecord:
+    """One ingested article, in newsolvr column order. Plain __slots__ class: cheap to create per raw API item."""
+
+    __slots__ = ("title", "content", "url", "published_date", "published_at")
+
+    def __init__(
+        self, title: str, content: str, url: str, published_date: str | None, published_at: int | None = None
+    ):
+        self.title = title
+        self.content = content
+        self.url = url
+        self.published_date = published_date
+        # UTC epoch seconds; parsed from published_date unless the source passes a more precise value.
+        self.published_at = published_epoch(published_date) if published_at is None else published_at
+
+    def as_row(self) -> tuple:
+        """Params for insert_articles: (title_article, content, link_article, published_date, published_at)."""
+        return (self.title, self.content, self.url, self.published_date, self.published_at)
+
+
+def unique_records(records: Iterable[ArticleRecord], seen: set, key: str = "url") -> Iterator[ArticleRecord]:
+    """Drop records whose key attribute was already seen; seen is shared across pages of one extraction run."""
+    for record in records:
+        value = getattr(record, key)
+        if value in seen:
+            continue
+        seen.add(value)
+        yield record
+
 
 INDUSTRY_LITERAL = Literal[
     "healthcare",
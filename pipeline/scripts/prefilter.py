@@ -0,0 +1,236 @@
+"""Local relevance pre-filter: hashed TF-IDF + logistic regression trained on our own original_score labels, used to
+spend LLM quota on the articles most likely to survive cleanup."""
+
+import json
+import math
+import random
+import re
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable
+
+from config.config import PREFILTER_MIN_EXAMPLES, PREFILTER_MODEL_PATH, PREFILTER_TARGET_RECALL
+from database import collect_prefilter_examples, fetch_prefilter_examples, record_prefilter_examples
+
+KEEP_SCORE = 85  # run_database_cleanup_pipeline keeps original_score >= 85
+N_FEATURES = 2**18
+MAX_TEXT_CHARS = 5000
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def _features(title: str | None, content: str | None) -> Counter:
+    """Hashed unigram and bigram counts of title + start of content (crc32, stable across processes)."""
+    text = f"{title or ''} {(content or '')[:MAX_TEXT_CHARS]}".lower()
+    tokens = _TOKEN.findall(text)
+    grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    return Counter(zlib.crc32(gram.encode("utf-8")) % N_FEATURES for gram in grams)
+
+
+def _tfidf(counts: Counter, idf: dict[int, float], default_idf: float) -> dict[int, float]:
+    vector = {bucket: (1 + math.log(count)) * idf.get(bucket, default_idf) for bucket, count in counts.items()}
+    norm = math.sqrt(sum(value * value for value in vector.values())) or 1.0
+    return {bucket: value / norm for bucket, value in vector.items()}
+
+
+def _sigmoid(z: float) -> float:
+    if z < 0:
+        e = math.exp(z)
+        return e / (1 + e)
+    return 1 / (1 + math.exp(-z))
+
+
+@dataclass
+class PrefilterModel:
+    idf: dict[int, float]
+    default_idf: float
+    weights: dict[int, float]
+    bias: float
+    threshold: float
+    trained_on: int
+    trained_at: str
+
+    def probabilities(self, articles: Iterable[tuple[str | None, str | None]]) -> list[float]:
+        """P(original_score >= KEEP_SCORE) for each (title, content)."""
+        scores = []
+        for title, content in articles:
+            vector = _tfidf(_features(title, content), self.idf, self.default_idf)
+            z = self.bias + sum(self.weights.get(bucket, 0.0) * value for bucket, value in vector.items())
+            scores.append(_sigmoid(z))
+        return scores
+
+    def save(self, path: Path = Path(PREFILTER_MODEL_PATH)) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "idf": self.idf,
+            "default_idf": self.default_idf,
+            "weights": self.weights,
+            "bias": self.bias,
+            "threshold": self.threshold,
+            "trained_on": self.trained_on,
+            "trained_at": self.trained_at,
+        }
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data), encoding="utf-8")
+        tmp.replace(path)
+
+
+def load_model(path: Path = Path(PREFILTER_MODEL_PATH)) -> PrefilterModel | None:
+    """Return the saved model, or None if none was trained yet."""
+    try:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    data["idf"] = {int(k): v for k, v in data["idf"].items()}
+    data["weights"] = {int(k): v for k, v in data["weights"].items()}
+    return PrefilterModel(**data)
+
+
+def fit(
+    examples: list[tuple[str | None, str | None, bool]],
+    epochs: int = 8,
+    learning_rate: float = 0.5,
+    l2: float = 1e-5,
+    seed: int = 0,
+) -> PrefilterModel:
+    """Train logistic regression with SGD on (title, content, keep) examples; classes are weighted to balance."""
+    counts = [_features(title, content) for title, content, _keep in examples]
+    labels = [keep for _title, _content, keep in examples]
+    n = len(examples)
+    document_frequency = Counter(bucket for c in counts for bucket in c)
+    idf = {bucket: math.log((1 + n) / (1 + df)) + 1 for bucket, df in document_frequency.items()}
+    default_idf = math.log(1 + n) + 1
+    vectors = [_tfidf(c, idf, default_idf) for c in counts]
+
+    positives = sum(labels) or 1
+    negatives = (n - sum(labels)) or 1
+    class_weight = {True: n / (2 * positives), False: n / (2 * negatives)}
+    weights: dict[int, float] = {}
+    bias = 0.0
+    order = list(range(n))
+    rng = random.Random(seed)
+    for epoch in range(epochs):
+        rng.shuffle(order)
+        rate = learning_rate / (1 + epoch)
+        for i in order:
+            vector = vectors[i]
+            z = bias + sum(weights.get(bucket, 0.0) * value for bucket, value in vector.items())
+            gradient = (_sigmoid(z) - labels[i]) * class_weight[labels[i]]
+            for bucket, value in vector.items():
+                w = weights.get(bucket, 0.0)
+                weights[bucket] = w - rate * (gradient * value + l2 * w)
+            bias -= rate * gradient
+    return PrefilterModel(
+        idf=idf,
+        default_idf=default_idf,
+        weights={bucket: w for bucket, w in weights.items() if abs(w) > 1e-6},
+        bias=bias,
+        threshold=0.0,
+        trained_on=n,
+        trained_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    )
+
+
+def threshold_for_recall(probabilities: list[float], labels: list[bool], target_recall: float) -> float:
+    """Highest threshold that still keeps target_recall of the positives (0.0 if there are none)."""
+    positive_scores = sorted((p for p, keep in zip(probabilities, labels) if keep), reverse=True)
+    if not positive_scores:
+        return 0.0
+    needed = max(1, math.ceil(target_recall * len(positive_scores)))
+    return positive_scores[needed - 1]
+
+
+def report(probabilities: list[float], labels: list[bool], threshold: float) -> dict[str, float]:
+    """Recall/precision at threshold and the share of articles that would be sent to the LLM."""
+    sent = [keep for p, keep in zip(probabilities, labels) if p >= threshold]
+    positives = sum(labels)
+    return {
+        "examples": len(labels),
+        "positives": positives,
+        "recall": sum(sent) / positives if positives else 1.0,
+        "precision": sum(sent) / len(sent) if sent else 0.0,
+        "sent_share": len(sent) / len(labels) if labels else 0.0,
+    }
+
+
+TRAIN, CALIBRATION, TEST = "train", "calibration", "test"
+
+
+def _split(uid: int) -> str:
+    """Deterministic 60/20/20 split by uid: the model is fit on train, its threshold picked on calibration, and
+    recall/precision reported on test, which neither step has seen."""
+    bucket = zlib.crc32(str(uid).encode("ascii")) % 5
+    return TEST if bucket == 0 else CALIBRATION if bucket == 1 else TRAIN
+
+
+def _load_examples(db_connection, record: bool = True) -> dict[str, list]:
+    """Examples per split. With record=False nothing is written: articles scored since the last cleanup are read
+    alongside the stored examples instead of being copied into prefilter_examples first."""
+    if record:
+        record_prefilter_examples(db_connection)
+        rows = fetch_prefilter_examples(db_connection)
+    else:
+        rows = [*fetch_prefilter_examples(db_connection), *collect_prefilter_examples(db_connection)]
+    splits = {TRAIN: [], CALIBRATION: [], TEST: []}
+    for uid, title, content, original_score in rows:
+        splits[_split(uid)].append((title, content, original_score >= KEEP_SCORE))
+    return splits
+
+
+def _scored(model: PrefilterModel, examples: list) -> tuple[list[float], list[bool]]:
+    """(probabilities, labels) of (title, content, keep) examples."""
+    labels = [keep for _title, _content, keep in examples]
+    return model.probabilities((title, content) for title, content, _keep in examples), labels
+
+
+def _print_report(label: str, metrics: dict[str, float], threshold: float) -> None:
+    print(
+        f"{label}: {metrics['examples']} examples ({metrics['positives']} kept), threshold {threshold:.3f}: "
+        f"recall {metrics['recall']:.1%}, precision {metrics['precision']:.1%}, "
+        f"{metrics['sent_share']:.1%} of articles sent to the LLM"
+    )
+
+
+def train(db_connection, target_recall: float = PREFILTER_TARGET_RECALL) -> PrefilterModel | None:
+    """Fit on the train split, pick the threshold reaching target_recall on the calibration split, save, and report
+    on the test split."""
+    splits = _load_examples(db_connection)
+    if sum(map(len, splits.values())) < PREFILTER_MIN_EXAMPLES:
+        print(f"Not enough labelled articles to train the pre-filter (need {PREFILTER_MIN_EXAMPLES}).")
+        return None
+    model = fit(splits[TRAIN])
+    model.threshold = threshold_for_recall(*_scored(model, splits[CALIBRATION]), target_recall)
+    model.save()
+    _print_report("Test", report(*_scored(model, splits[TEST]), model.threshold), model.threshold)
+    return model
+
+
+def evaluate(db_connection) -> dict[str, float] | None:
+    """Report the saved model's recall/precision on the test split (which now includes newly labelled articles). Read-only."""
+    model = load_model()
+    if model is None:
+        print("No pre-filter model trained yet; run `python -m pipeline prefilter train`.")
+        return None
+    metrics = report(*_scored(model, _load_examples(db_connection, record=False)[TEST]), model.threshold)
+    _print_report("Test", metrics, model.threshold)
+    return metrics
+
+
+def prioritize(articles: Iterable[tuple[int, str | None, str | None]], model: PrefilterModel | None) -> list[int]:
+    """Order the uids of (uid, title, content) by predicted keep probability and drop those under the model threshold.
+
+    Without a model every uid is returned in the original order. Only (probability, uid) is kept per article, so
+    articles can be streamed from the database. The caller records the dropped ones (hold_back_articles), so they
+    are not scored again on every run.
+    """
+    if model is None:
+        return [uid for uid, _title, _content in articles]
+    ranked = []
+    for uid, title, content in articles:
+        (probability,) = model.probabilities([(title, content)])
+        if probability >= model.threshold:
+            ranked.append((probability, uid))
+    ranked.sort(key=lambda pair: pair[0], reverse=True)
+    return [uid for _p, uid in ranked]
@@ -0,0 +1,105 @@
+"""Token-bucket rate limiting for Gemini calls: requests/minute, tokens/minute and a requests/day quota persisted in the database."""
+
+import threading
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from config.config import (
+    LLM_QUOTA_TIMEZONE,
+    LLM_RATE_LIMIT_RPD,
+    LLM_RATE_LIMIT_RPM,
+    LLM_RATE_LIMIT_TPM,
+)
+from database import add_llm_usage
+
+
+class TokenBucket:
+    """Holds up to capacity tokens, refilled continuously at capacity per period seconds. Thread-safe."""
+
+    def __init__(self, capacity: float, period_seconds: float = 60.0):
+        self.capacity = capacity
+        self._rate = capacity / period_seconds
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def acquire(self, amount: float = 1) -> None:
+        """Block until amount tokens are available and take them (amount is clamped to capacity)."""
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                wait = (amount - self._tokens) / self._rate
+            time.sleep(wait)
+
+    def adjust(self, amount: float) -> None:
+        """Give back (positive) or additionally take (negative) tokens, e.g. to correct an estimate; may go into debt."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+
+class LlmRateLimiter:
+    """Enforces LLM_RATE_LIMIT_RPM, LLM_RATE_LIMIT_TPM and LLM_RATE_LIMIT_RPD jointly across threads.
+
+    The daily request counter lives in the llm_usage table (keyed by the provider's quota day), so restarting
+    the pipeline does not reset it. A 429 pauses every caller via pause(), and refund() returns its daily slot.
+    """
+
+    def __init__(
+        self,
+        db_connection,
+        rpm: int = LLM_RATE_LIMIT_RPM,
+        tpm: int = LLM_RATE_LIMIT_TPM,
+        rpd: int = LLM_RATE_LIMIT_RPD,
+    ):
+        self._db = db_connection
+        self._requests = TokenBucket(rpm)
+        self._tokens = TokenBucket(tpm)
+        self._rpd = rpd
+        self._paused_until = 0.0
+        self._pause_lock = threading.Lock()
+
+    @staticmethod
+    def quota_day() -> str:
+        return datetime.now(ZoneInfo(LLM_QUOTA_TIMEZONE)).date().isoformat()
+
+    def acquire(self, estimated_tokens: int) -> bool:
+        """Wait for a request slot. Returns False (without waiting) once today's RPD quota is used up."""
+        used_today = add_llm_usage(self._db, self.quota_day(), requests=1, tokens=estimated_tokens)
+        if used_today > self._rpd:
+            add_llm_usage(self._db, self.quota_day(), requests=-1, tokens=-estimated_tokens)
+            return False
+        while True:
+            with self._pause_lock:
+                wait = self._paused_until - time.monotonic()
+            if wait <= 0:
+                break
+            time.sleep(wait)
+        self._requests.acquire()
+        self._tokens.acquire(estimated_tokens)
+        return True
+
+    def refund(self, estimated_tokens: int) -> None:
+        """Give back the daily request and tokens taken by acquire() for a request the API rejected (a 429 is not
+        billed), so retries only count against RPD once they are accepted."""
+        add_llm_usage(self._db, self.quota_day(), requests=-1, tokens=-estimated_tokens)
+
+    def record_tokens(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Correct the TPM bucket and today's token count once a response reports its real usage."""
+        self._tokens.adjust(estimated_tokens - actual_tokens)
+        add_llm_usage(self._db, self.quota_day(), requests=0, tokens=actual_tokens - estimated_tokens)
+
+    def pause(self, seconds: float) -> None:
+        """Hold back all callers for seconds (e.g. Retry-After of a 429)."""
+        with self._pause_lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
@@ -0,0 +1,54 @@
+"""Set-based article scoring: one SQL UPDATE computes original_score and total_score for the rows that need it."""
+
+import time
+
+from config.config import SCORE_WEIGHTS
+from database import run_query
+from pipeline.scripts.pipeline_dataclasses import NUMERIC_SCORE_COLUMNS
+from pipeline.scripts.timeliness_functions import next_decay_sql, timeliness_sql
+
+MAX_SUBSCORE = 5
+
+# Rows whose score is missing or whose timeliness step has expired; both branches are index lookups.
+_DUE_ROWS = """
+    SELECT uid FROM newsolvr WHERE original_score IS NULL AND problem_statement IS NOT NULL
+    UNION
+    SELECT uid FROM newsolvr WHERE next_decay_at <= :now"""
+_ALL_ROWS = "SELECT uid FROM newsolvr WHERE problem_statement IS NOT NULL"
+
+
+def scoring_sql(weights: dict[str, float], rescore_all: bool = False) -> tuple[str, dict[str, float]]:
+    """Build the scoring UPDATE and its named parameters (weights are bound, not inlined).
+
+    original_score = weighted subscore sum as a percentage of its maximum; total_score additionally applies the
+    timeliness multiplier for the article's age, and next_decay_at records when that multiplier next drops.
+    Unless rescore_all, only unscored rows and rows past their next_decay_at are touched.
+    """
+    unknown = set(weights) - set(NUMERIC_SCORE_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown score columns in weights: {sorted(unknown)}")
+    columns = [column for column in NUMERIC_SCORE_COLUMNS if weights.get(column)]
+    max_points = sum(weights[column] for column in columns) * MAX_SUBSCORE
+    if max_points <= 0:
+        raise ValueError("Score weights must sum to a positive number")
+    weighted_sum = " + ".join(f":w_{column} * n.{column}" for column in columns)
+    days = "((:now - n.published_at) / 86400.0)"
+    query = f"""UPDATE newsolvr SET
+        original_score = CAST(round(scored.points * 1.0 / :max_points * 100) AS INTEGER),
+        total_score = CAST(round(scored.points * scored.timeliness / :max_points * 100) AS INTEGER),
+        next_decay_at = scored.next_decay_at
+    FROM (
+        SELECT n.uid, {weighted_sum} AS points, {timeliness_sql(days)} AS timeliness,
+            {next_decay_sql(days, "n.published_at")} AS next_decay_at
+        FROM newsolvr n WHERE n.uid IN ({_ALL_ROWS if rescore_all else _DUE_ROWS})
+    ) AS scored
+    WHERE newsolvr.uid = scored.uid"""
+    params = {"max_points": max_points, "now": int(time.time())}
+    params.update((f"w_{column}", weights[column]) for column in columns)
+    return query, params
+
+
+def score_articles(db_connection, weights: dict[str, float] = SCORE_WEIGHTS, rescore_all: bool = False) -> None:
+    """Score new articles and rescore those whose timeliness step changed, in a single statement (one transaction)."""
+    query, params = scoring_sql(weights, rescore_all)
+    run_query(db_connection, query, params)
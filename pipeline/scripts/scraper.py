@@ -0,0 +1,131 @@
+"""Polite concurrent scraping of article pages (many hosts in parallel, one request at a time per host) and the text extraction stage behind it."""
+
+import multiprocessing
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Iterable, Iterator
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+from config.config import (
+    EXTRACTION_WORKERS,
+    FETCH_HTML_HEADERS,
+    FETCH_HTML_TIMEOUT,
+    SCRAPE_DELAY_SECONDS,
+    SCRAPE_MAX_HOSTS,
+)
+from pipeline.scripts.http_client import get_session
+from pipeline.scripts.news_api import extract_article_text, fetch_article_html
+
+_USER_AGENT = FETCH_HTML_HEADERS.get("User-Agent", "*")
+_DONE = object()
+
+
+def _load_robots(scheme: str, host: str) -> RobotFileParser | None:
+    """Fetch and parse robots.txt for a host. Returns None if it is missing or unreachable (everything allowed)."""
+    try:
+        resp = get_session().get(
+            f"{scheme}://{host}/robots.txt", headers=FETCH_HTML_HEADERS, timeout=FETCH_HTML_TIMEOUT
+        )
+    except requests.RequestException:
+        return None
+    if resp.status_code != 200:
+        return None
+    robots = RobotFileParser()
+    robots.parse(resp.text.splitlines())
+    return robots
+
+
+def _scrape_host(
+    scheme: str, host: str, items: list[tuple[int, str]], results: queue.Queue, stop: threading.Event
+) -> None:
+    """Fetch one host's URLs sequentially, spacing request starts by max(SCRAPE_DELAY_SECONDS, robots Crawl-delay)."""
+    try:
+        robots = _load_robots(scheme, host)
+        delay = SCRAPE_DELAY_SECONDS
+        if robots is not None:
+            delay = max(delay, robots.crawl_delay(_USER_AGENT) or 0)
+        last_start = None
+        for uid, url in items:
+            if stop.is_set():
+                break
+            if robots is not None and not robots.can_fetch(_USER_AGENT, url):
+                print(f"Skipping {url}: disallowed by robots.txt")
+                results.put((uid, None))
+                continue
+            if last_start is not None:
+                wait = last_start + delay - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+            last_start = time.monotonic()
+            results.put((uid, fetch_article_html(url)))
+    finally:
+        results.put(_DONE)
+
+
+def scrape_articles(items: Iterable[tuple[int, str]], max_hosts: int = SCRAPE_MAX_HOSTS) -> Iterator[tuple[int, str | None]]:
+    """Fetch HTML for (uid, url) pairs and yield (uid, html or None) as pages arrive.
+
+    URLs are grouped by host; up to max_hosts hosts are scraped at once over the shared pooled session, each
+    with its own politeness delay, so the delay only idles the host it applies to. Pages pass through a bounded
+    queue, so fetching pauses while the consumer is behind.
+    """
+    by_host: dict[tuple[str, str], list[tuple[int, str]]] = defaultdict(list)
+    for uid, url in items:
+        parts = urlsplit(url)
+        by_host[(parts.scheme or "https", parts.netloc.lower())].append((uid, url))
+    if not by_host:
+        return
+
+    workers = max(1, min(max_hosts, len(by_host)))
+    results: queue.Queue = queue.Queue(maxsize=2 * workers)
+    stop = threading.Event()
+    remaining = len(by_host)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for (scheme, host), host_items in by_host.items():
+            executor.submit(_scrape_host, scheme, host, host_items, results, stop)
+        try:
+            while remaining:
+                item = results.get()
+                if item is _DONE:
+                    remaining -= 1
+                    continue
+                yield item
+        finally:
+            # Consumer stopped early: let blocked host workers finish so the executor can shut down.
+            stop.set()
+            while remaining:
+                if results.get() is _DONE:
+                    remaining -= 1
+
+
+def extract_texts(
+    pages: Iterable[tuple[int, str | None]], max_workers: int = EXTRACTION_WORKERS
+) -> Iterator[tuple[int, str | None]]:
+    """Run extract_article_text on a process pool and yield (uid, text or None) as extractions finish.
+
+    At most 2 * max_workers pages are in flight; pulling the next page only when there is room keeps the fetch
+    stage (scrape_articles) and extraction overlapping without buffering the whole backlog.
+    """
+    max_in_flight = 2 * max(1, max_workers)
+    # spawn: the fetch stage's threads are already running when workers start, and forking threads is unsafe.
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max(1, max_workers), mp_context=context) as pool:
+        pending = {}
+        for uid, html in pages:
+            if html is None:
+                continue
+            pending[pool.submit(extract_article_text, html)] = uid
+            if len(pending) >= max_in_flight:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future.result()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
@@ -1,26 +1,18 @@
-"""Timeliness scoring: older articles get fewer points. Uses standard library only."""
+"""Timeliness scoring: older articles get fewer points."""
 
 from datetime import datetime, timezone
 
+from utils.date_parsing import published_epoch
+
+# (days old below which it applies, multiplier); anything older gets TIMELINESS_FLOOR.
+TIMELINESS_STEPS = ((1, 1.0), (2, 0.99), (3, 0.95), (4, 0.9))
+TIMELINESS_FLOOR = 0.8
+
 
 def parse_published_date(published_date: str | None) -> datetime | None:
     """Parse DB string (ISO with time, date-only, or empty). Returns None on missing/invalid."""
-    if not published_date or not str(published_date).strip():
-        return None
-    s = str(published_date).strip()
-    # ISO with time (e.g. 2025-02-21T12:00:00Z or 2025-02-21T12:00:00+00:00)
-    try:
-        dt = datetime.fromisoformat(s.replace("Z", "+00:00"))
-        return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
-    except (ValueError, TypeError):
-        pass
-    # Date-only (e.g. 2025-02-21)
-    try:
-        dt = datetime.strptime(s[:10], "%Y-%m-%d")
-        return dt.replace(tzinfo=timezone.utc)
-    except (ValueError, TypeError):
-        pass
-    return None
+    epoch = published_epoch(published_date)
+    return None if epoch is None else datetime.fromtimestamp(epoch, timezone.utc)
 
 
 def days_ago(
@@ -47,7 +39,22 @@ def timeliness_score(
 ) -> float:
     """Return multiplier in [0, 1]: 1 (day 1), 0.99 (day 2), 0.95 (day 3), 0.9 (day 4), 0.8 (day 5+)."""
     days = days_ago(published_date, reference=reference)
-    table = {0: 1.0, 1: 0.99, 2: 0.95, 3: 0.9, 4: 0.8}
-    if days <= 4:
-        return table[int(days)]
-    return 0.8
+    for limit, multiplier in TIMELINESS_STEPS:
+        if days < limit:
+            return multiplier
+    return TIMELINESS_FLOOR
+
+
+def timeliness_sql(days_expression: str) -> str:
+    """SQL CASE with the same steps as timeliness_score over a days-old expression (NULL gets the floor)."""
+    steps = " ".join(f"WHEN {days_expression} < {limit} THEN {multiplier}" for limit, multiplier in TIMELINESS_STEPS)
+    return f"(CASE {steps} ELSE {TIMELINESS_FLOOR} END)"
+
+
+def next_decay_sql(days_expression: str, published_epoch_expression: str) -> str:
+    """SQL CASE giving the epoch second at which the multiplier next drops (NULL once it reached the floor)."""
+    steps = " ".join(
+        f"WHEN {days_expression} < {limit} THEN {published_epoch_expression} + {limit * 86400}"
+        for limit, _multiplier in TIMELINESS_STEPS
+    )
+    return f"(CASE {steps} ELSE NULL END)"
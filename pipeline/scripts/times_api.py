@@ -1,18 +1,40 @@
 import html as html_module
+import math
 import re
 from datetime import datetime, timedelta
+from typing import Iterable, Iterator
 
-import pandas as pd
 import requests
 
 from config.config import (
     API_EXTRACTION_LAG_MINUTES,
     API_EXTRACTION_WINDOW,
+    API_REQUEST_TIMEOUT,
+    TIMES_API_CONCURRENCY,
     TIMES_API_KEY,
+    TIMES_API_PREFETCH_PAGES,
+    TIMES_API_RPM,
 )
-from database import close_db, connect_to_db, run_query
+from database import close_db, connect_to_db, insert_articles
+from pipeline.scripts.http_client import (
+    ApiRequestError,
+    RequestBudget,
+    get_session,
+    paginate_concurrently,
+)
+from pipeline.scripts.pipeline_dataclasses import ArticleRecord, unique_records
+from pipeline.scripts.window_planner import ExtractionWindow, WindowSpec, run_incremental_sweep
+from utils.date_parsing import published_epoch
 
+SOURCE = "times"
 BASE_URL = "https://api.nytimes.com/svc/search/v2/articlesearch.json"
+MAX_PAGES = 100
+PAGE_SIZE = 10
+
+# begin_date/end_date are whole days and the API stops paginating after MAX_PAGES pages of PAGE_SIZE.
+WINDOW_SPEC = WindowSpec(resolution=timedelta(days=1), result_cap=MAX_PAGES * PAGE_SIZE)
+
+_budget = RequestBudget(TIMES_API_CONCURRENCY, TIMES_API_RPM)
 
 
 def _html_to_plain(html: str) -> str:
@@ -23,49 +45,52 @@ def _html_to_plain(html: str) -> str:
     return html_module.unescape(text).strip()
 
 
-def get_times_articles(topic: str, from_date: datetime, to_date: datetime) -> dict | None:
-    """Fetch all pages of New York Times Article Search. Returns raw response JSON or None on failure."""
-    if not TIMES_API_KEY:
-        print("TIMES_API_KEY not set; skipping Times API.")
-        return None
-    begin_date = from_date.strftime("%Y%m%d")
-    end_date = to_date.strftime("%Y%m%d")
-    all_docs = []
-    page = 0
-    while page < 100:
-        params = {
-            "q": topic,
-            "begin_date": begin_date,
-            "end_date": end_date,
-            "page": page,
-            "sort": "newest",
-            "api-key": TIMES_API_KEY,
-        }
-        resp = requests.get(BASE_URL, params=params)
-        if resp.status_code != 200:
-            print(f"Times API failed {resp.status_code}")
-            return None
-        data = resp.json()
-        response = data.get("response", {})
-        docs = response.get("docs", [])
-        if not docs:
-            break
-        all_docs.extend(docs)
-        if len(docs) < 10:
-            break
-        page += 1
-    return {"response": {"docs": all_docs}} if all_docs else {"response": {"docs": []}}
-
-
-def transform_times_articles(raw: dict | None) -> pd.DataFrame:
-    """Build DataFrame with columns matching DB: title, content, url, published_date."""
+def _get_times_page(params: dict, page: int) -> dict:
+    """Fetch one page of Article Search and return the raw JSON. Raises ApiRequestError on failure."""
+    with _budget:
+        resp = get_session().get(
+            BASE_URL, params={**params, "page": page}, timeout=API_REQUEST_TIMEOUT
+        )
+    if resp.status_code != 200:
+        raise ApiRequestError(f"Times API failed {resp.status_code}")
+    return resp.json()
+
+
+def _is_short_page(raw: dict) -> bool:
+    return len(raw.get("response", {}).get("docs") or []) < PAGE_SIZE
+
+
+def iter_times_pages(
+    topic: str, from_date: datetime, to_date: datetime, result_cap: int | None = None
+) -> Iterator[dict]:
+    """Yield raw Article Search pages as they arrive. Page 0 comes first; if its meta reports more than result_cap hits nothing else is fetched. Further pages are prefetched TIMES_API_PREFETCH_PAGES at a time until one comes back short."""
+    params = {
+        "q": topic,
+        "begin_date": from_date.strftime("%Y%m%d"),
+        "end_date": to_date.strftime("%Y%m%d"),
+        "sort": "newest",
+        "api-key": TIMES_API_KEY,
+    }
+    first = _get_times_page(params, 0)
+    yield first
+    hits = (first.get("response", {}).get("meta") or {}).get("hits") or 0
+    if (result_cap is not None and hits > result_cap) or _is_short_page(first):
+        return
+    stop_page = min(MAX_PAGES, math.ceil(hits / PAGE_SIZE)) if hits else MAX_PAGES
+    yield from paginate_concurrently(
+        lambda page: _get_times_page(params, page),
+        1,
+        stop_page,
+        TIMES_API_PREFETCH_PAGES,
+        is_last=_is_short_page,
+    )
+
+
+def transform_times_articles(raw: dict | None) -> Iterator[ArticleRecord]:
+    """Yield an ArticleRecord per doc in one page of results (title, lead paragraph or snippet, url, publication day)."""
     if not raw:
-        return pd.DataFrame()
-    docs = raw.get("response", {}).get("docs", [])
-    if not docs:
-        return pd.DataFrame()
-    rows = []
-    for doc in docs:
+        return
+    for doc in raw.get("response", {}).get("docs") or []:
         headline = doc.get("headline") or {}
         title = headline.get("main") or headline.get("kicker") or ""
         url = doc.get("web_url") or ""
@@ -75,45 +100,55 @@ def transform_times_articles(raw: dict | None) -> pd.DataFrame:
         snippet = _html_to_plain(doc.get("snippet") or "")
         content = lead if lead else snippet
         pub_date = doc.get("pub_date", "")
+        published_at = published_epoch(pub_date)
         if isinstance(pub_date, str) and "T" in pub_date:
             pub_date = pub_date.split("T")[0]
-        rows.append(
-            {
-                "title": title,
-                "content": content,
-                "url": url,
-                "published_date": pub_date,
-            }
-        )
-    df = pd.DataFrame(rows).drop_duplicates(subset="url")
-    return df
-
-
-def save_times_articles(conn, df: pd.DataFrame) -> None:
-    """Insert Times rows into newsolvr. Caller manages connection."""
-    for row in df.itertuples(index=False):
-        run_query(
-            conn,
-            """INSERT INTO newsolvr
-            (title_article, content_article, link_article, published_date)
-            VALUES (?, ?, ?, ?)
-            ON CONFLICT (link_article) DO NOTHING""",
-            (row.title, row.content, row.url, row.published_date),
-        )
+        yield ArticleRecord(title, content, url, pub_date, published_at)
+
+
+def save_times_articles(conn, records: Iterable[ArticleRecord]) -> tuple[int, int]:
+    """Bulk-insert Times records into newsolvr in one transaction; returns (inserted, ignored). Caller manages connection."""
+    return insert_articles(conn, (record.as_row() for record in records))
+
+
+def ingest_times_window(
+    conn, topic: str, window: ExtractionWindow, seen: set, result_cap: int | None = None
+) -> int | None:
+    """Stream every page of one window into the database as it arrives, skipping urls already in seen. Returns the window's hit count (nothing is stored if it exceeds result_cap), or None on failure."""
+    if not TIMES_API_KEY:
+        print("TIMES_API_KEY not set; skipping Times API.")
+        return None
+    hits = 0
+    try:
+        for i, raw in enumerate(iter_times_pages(topic, window.start, window.last_instant, result_cap)):
+            if i == 0:
+                hits = (raw.get("response", {}).get("meta") or {}).get("hits") or 0
+                if result_cap is not None and hits > result_cap:
+                    return hits
+            save_times_articles(conn, unique_records(transform_times_articles(raw), seen))
+    except (ApiRequestError, requests.RequestException) as e:
+        print(e)
+        return None
+    return hits
 
 
 def times_api_extraction_pipeline(search_topic: str, iterations: int = 24):
-    """Fetch New York Times articles and persist to database. Reuses API_EXTRACTION_WINDOW and LAG from config. iterations defaults to 24 for full-day coverage."""
+    """Fetch New York Times articles and persist to database. Reuses API_EXTRACTION_WINDOW and LAG from config; iterations * window is the span covered (default 24 hours); only the part after the stored watermark is fetched, queried per calendar day span and split by day only when the 1000-result cap is hit."""
     conn = connect_to_db()
     window_delta = timedelta(minutes=API_EXTRACTION_WINDOW)
     lag_delta = timedelta(minutes=API_EXTRACTION_LAG_MINUTES)
     to_date = datetime.now() - lag_delta
-    from_date = to_date - window_delta
-    for _ in range(iterations):
-        raw = get_times_articles(search_topic, from_date, to_date)
-        df = transform_times_articles(raw)
-        save_times_articles(conn, df)
-        from_date -= window_delta
-        to_date -= window_delta
+    from_date = to_date - iterations * window_delta
+    seen_urls = set()
+    run_incremental_sweep(
+        conn,
+        SOURCE,
+        search_topic,
+        from_date,
+        to_date,
+        WINDOW_SPEC,
+        lambda w, cap: ingest_times_window(conn, search_topic, w, seen_urls, cap),
+        TIMES_API_CONCURRENCY,
+    )
     print("Pipeline complete: extract Times articles from api.")
     close_db(conn)
@@ -0,0 +1,204 @@
+"""Extraction window planning: coalesce a time span to each API's native resolution and split only on result caps."""
+
+import json
+import math
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Iterator, NamedTuple
+
+from database import get_extraction_state, save_extraction_state
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+@dataclass(frozen=True)
+class WindowSpec:
+    """Search API limits: smallest time step the API filters on, and max results one query can return (None = unbounded)."""
+
+    resolution: timedelta
+    result_cap: int | None = None
+
+
+class ExtractionWindow(NamedTuple):
+    """Half-open time window [start, end) aligned to a WindowSpec resolution."""
+
+    start: datetime
+    end: datetime
+
+    @property
+    def last_instant(self) -> datetime:
+        """Inclusive end, for APIs whose to-date is inclusive (e.g. date-only filters)."""
+        return self.end - timedelta(microseconds=1)
+
+
+def _floor(moment: datetime, resolution: timedelta) -> datetime:
+    return moment - (moment - _EPOCH) % resolution
+
+
+def _ceil(moment: datetime, resolution: timedelta) -> datetime:
+    floored = _floor(moment, resolution)
+    return floored if floored == moment else floored + resolution
+
+
+def align_window(start: datetime, end: datetime, resolution: timedelta) -> ExtractionWindow:
+    """Widen [start, end) outward to resolution boundaries."""
+    return ExtractionWindow(_floor(start, resolution), _ceil(end, resolution))
+
+
+def split_window(window: ExtractionWindow, parts: int, resolution: timedelta) -> list[ExtractionWindow]:
+    """Split window into at most `parts` consecutive aligned sub-windows. Returns [window] if it cannot be split."""
+    steps = (window.end - window.start) // resolution
+    parts = min(parts, steps)
+    if parts <= 1:
+        return [window]
+    step = math.ceil(steps / parts) * resolution
+    windows = []
+    start = window.start
+    while start < window.end:
+        end = min(start + step, window.end)
+        windows.append(ExtractionWindow(start, end))
+        start = end
+    return windows
+
+
+def plan_windows(
+    start: datetime,
+    end: datetime,
+    spec: WindowSpec,
+    completed: list[tuple[datetime, datetime]] = (),
+) -> list[ExtractionWindow]:
+    """Coalesce [start, end) minus already-completed intervals into windows at the API's native resolution; sweep_windows splits them further if capped."""
+    windows = []
+    for done_start, done_end in sorted(completed):
+        if done_start > start:
+            windows.append(align_window(start, min(done_start, end), spec.resolution))
+        start = max(start, done_end)
+        if start >= end:
+            break
+    if start < end:
+        windows.append(align_window(start, end, spec.resolution))
+    return windows
+
+
+class SweepProgress:
+    """Resume point of a sweep over [watermark, end).
+
+    The watermark only advances across a contiguous run of finished windows, because windows finish out of order;
+    finished intervals beyond it are kept as the cursor so a resumed run can skip them.
+    """
+
+    def __init__(self, watermark: datetime, end: datetime, completed: list[tuple[datetime, datetime]] = ()):
+        self.watermark = watermark
+        self.end = end
+        self.completed = sorted(completed)
+        self._advance()
+
+    def mark_done(self, window: ExtractionWindow) -> None:
+        self.completed.append((window.start, min(window.end, self.end)))
+        self.completed.sort()
+        self._advance()
+
+    def _advance(self) -> None:
+        remaining = []
+        for start, end in self.completed:
+            if start <= self.watermark:
+                self.watermark = max(self.watermark, end)
+            else:
+                remaining.append((start, end))
+        self.completed = remaining
+
+    def cursor_json(self) -> str:
+        return json.dumps([[start.isoformat(), end.isoformat()] for start, end in self.completed])
+
+
+def _load_progress(db_connection, source: str, query: str, from_date: datetime, to_date: datetime) -> SweepProgress:
+    """Start from the stored watermark (never earlier than from_date) and keep stored completed intervals."""
+    watermark, cursor = get_extraction_state(db_connection, source, query)
+    start = from_date
+    if watermark:
+        start = max(start, datetime.fromisoformat(watermark))
+    completed = [
+        (datetime.fromisoformat(done_start), datetime.fromisoformat(done_end))
+        for done_start, done_end in json.loads(cursor or "[]")
+    ]
+    return SweepProgress(start, to_date, [(s, e) for s, e in completed if e > start])
+
+
+def sweep_windows(
+    windows: list[ExtractionWindow],
+    spec: WindowSpec,
+    ingest: Callable[[ExtractionWindow, int | None], int | None],
+    max_workers: int,
+    max_requests: int | None = None,
+) -> Iterator[tuple[ExtractionWindow, int | None]]:
+    """Ingest windows concurrently and yield (window, hits) as they finish.
+
+    ingest(window, result_cap) fetches and stores one window and returns its total hit count (None on failure).
+    It receives the cap only while the window can still be split; a window with more hits than that is replaced
+    by ceil(hits / cap) sub-windows (ingest may already have stored the results it fetched; re-fetched articles
+    are ignored on insert). At most max_requests ingest calls are made; windows beyond that budget are not
+    yielded, so they stay behind the watermark and the next run picks them up, oldest first.
+    """
+    if not windows:
+        return
+
+    def can_split(window: ExtractionWindow) -> bool:
+        return spec.result_cap is not None and window.end - window.start > spec.resolution
+
+    budget = math.inf if max_requests is None else max_requests
+    deferred = 0
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        pending = {}
+
+        def submit(queue: list[ExtractionWindow]) -> None:
+            nonlocal budget, deferred
+            for window in queue:
+                if budget <= 0:
+                    deferred += 1
+                    continue
+                budget -= 1
+                pending[executor.submit(ingest, window, spec.result_cap if can_split(window) else None)] = window
+
+        submit(windows)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                window = pending.pop(future)
+                hits = future.result()
+                if hits is not None and can_split(window) and hits > spec.result_cap:
+                    submit(split_window(window, math.ceil(hits / spec.result_cap), spec.resolution))
+                    continue
+                yield window, hits
+    if deferred:
+        print(f"Request budget of {max_requests} used up; {deferred} windows left for the next run.")
+
+
+def run_incremental_sweep(
+    db_connection,
+    source: str,
+    query: str,
+    from_date: datetime,
+    to_date: datetime,
+    spec: WindowSpec,
+    ingest: Callable[[ExtractionWindow, int | None], int | None],
+    max_workers: int,
+    max_requests: int | None = None,
+) -> None:
+    """sweep_windows over the part of [from_date, to_date) not yet ingested for (source, query).
+
+    Progress is saved to extraction_state as each window finishes, so a crashed run resumes from the last
+    watermark and skips windows that already finished. A failed window (hits is None) is not recorded, so the
+    next run retries it; so are windows left over once max_requests is spent.
+    """
+    progress = _load_progress(db_connection, source, query, from_date, to_date)
+    if progress.watermark >= to_date:
+        return
+    windows = plan_windows(progress.watermark, to_date, spec, progress.completed)
+    for window, hits in sweep_windows(windows, spec, ingest, max_workers, max_requests):
+        if hits is None:
+            continue
+        progress.mark_done(window)
+        save_extraction_state(
+            db_connection, source, query, progress.watermark.isoformat(), progress.cursor_json()
+        )
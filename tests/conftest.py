@@ -0,0 +1,24 @@
+import os
+
+import pytest
+
+# config.config reads these at import time and has no defaults for them.
+for name, value in {
+    "LLM_RATE_LIMIT_RPM": "15",
+    "LLM_RATE_LIMIT_RPD": "1000",
+    "API_EXTRACTION_LAG_MINUTES": "1560",
+    "API_EXTRACTION_WINDOW": "60",
+}.items():
+    os.environ.setdefault(name, value)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Connection to a freshly migrated database in tmp_path."""
+    from database import close_db, connect_to_db, db_utils, migrate
+
+    monkeypatch.setattr(db_utils, "DB_PATH", str(tmp_path / "newsolvr.db"))
+    connection = connect_to_db()
+    migrate(connection)
+    yield connection
+    close_db(connection)
@@ -0,0 +1,54 @@
+"""The hot read paths must be served by their partial indexes (see the access-path migration)."""
+
+import pytest
+
+from database import db_utils, fetch_top_ranked_problems, fetch_unanalyzed_articles, get_query, run_many
+
+
+@pytest.fixture
+def populated_db(db):
+    run_many(
+        db,
+        """INSERT INTO newsolvr (title_article, link_article, problem_statement, problem_size, industry, total_score)
+        VALUES (?, ?, ?, ?, ?, ?)""",
+        (
+            (
+                f"title {i}",
+                f"https://example.com/{i}",
+                None if i % 4 == 0 else "statement",
+                ("niche", "global")[i % 2],
+                ("healthcare", "energy", "education")[i % 3],
+                60 + i % 40,
+            )
+            for i in range(400)
+        ),
+    )
+    return db
+
+
+def query_plan(db, monkeypatch, fetch, *args, **kwargs) -> str:
+    """EXPLAIN QUERY PLAN details of the statement fetch(db, ...) runs, joined into one string."""
+    captured = []
+    with monkeypatch.context() as patch:
+        patch.setattr(db_utils, "get_query", lambda _db, query, params=None: captured.append((query, params)) or [])
+        fetch(db, *args, **kwargs)
+    ((query, params),) = captured
+    return " | ".join(row[3] for row in get_query(db, f"EXPLAIN QUERY PLAN {query}", params))
+
+
+def test_unanalyzed_queue_uses_partial_index(populated_db, monkeypatch):
+    assert "idx_newsolvr_unanalyzed" in query_plan(populated_db, monkeypatch, fetch_unanalyzed_articles)
+
+
+@pytest.mark.parametrize(
+    ("filters", "index"),
+    [
+        ({}, "idx_newsolvr_ranked"),
+        ({"problem_size": "niche"}, "idx_newsolvr_ranked_size"),
+        ({"industry": "energy"}, "idx_newsolvr_ranked_industry"),
+    ],
+)
+def test_ranked_problems_use_partial_index(populated_db, monkeypatch, filters, index):
+    plan = query_plan(populated_db, monkeypatch, fetch_top_ranked_problems, limit=20, **filters)
+    assert f"USING INDEX {index} " in f"{plan} "
+    assert "TEMP B-TREE" not in plan
@@ -0,0 +1,18 @@
+from datetime import datetime, timezone
+
+
+def published_epoch(published_date: str | None) -> int | None:
+    """UTC epoch seconds of an ISO timestamp (Z or offset, naive = UTC) or YYYY-MM-DD date; None if unparseable."""
+    if not published_date or not str(published_date).strip():
+        return None
+    value = str(published_date).strip()
+    try:
+        moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            moment = datetime.strptime(value[:10], "%Y-%m-%d")
+        except ValueError:
+            return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())